@@ -0,0 +1,197 @@
+"""Batched game environments for agents and automated tuning.
+
+BatchEnv runs N independent game.World instances, sharded across worker processes.
+Actions, observations, rewards and done flags live in shared-memory NumPy arrays, so
+a step only sends one small message per worker.
+
+    env = BatchEnv(64)
+    obs = env.reset(seeds=range(64))
+    obs, rewards, dones = env.step(np.full(64, game.INPUT_RIGHT, np.uint8))
+    env.close()
+
+An action is an InputState bitmask (game.INPUT_LEFT | INPUT_RIGHT | INPUT_JUMP |
+INPUT_SHOOT). Worlds that finish are reset with a fresh seed on the same step; their
+done flag is set for that step. Fresh seeds come from a per-world stream seeded by that
+world's reset seed, so a seeded batch replays identically however it is sharded. endless=True plays procedurally generated chunks
+instead of the campaign levels.
+"""
+import multiprocessing as mp
+import os
+import random
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import game
+
+NEAREST = 8              # nearest enemies / projectiles / collectibles per observation
+SENSE_RANGE = game.SCREEN_WIDTH
+MAX_EPISODE_TICKS = game.FPS * 60 * 5
+
+# observation layout: player block, then NEAREST x (dx, dy, present) per entity kind
+PLAYER_FIELDS = ('x', 'y', 'w', 'h', 'vx', 'vy', 'health', 'score', 'on_ground',
+                 'has_hockey', 'has_laptop')
+ENTITY_KINDS = ('enemies', 'projectiles', 'collectibles')
+OBS_SIZE = len(PLAYER_FIELDS) + len(ENTITY_KINDS) * NEAREST * 3
+
+def _nearest(dx, dy, out):
+    # fill out (NEAREST, 3) with the closest offsets in range; unused rows stay zero
+    out[:] = 0.0
+    if not len(dx):
+        return
+    dist = dx * dx + dy * dy
+    near = np.flatnonzero(dist <= SENSE_RANGE * SENSE_RANGE)
+    if len(near) > NEAREST:
+        near = near[np.argpartition(dist[near], NEAREST)[:NEAREST]]
+    near = near[np.argsort(dist[near], kind='stable')]
+    k = len(near)
+    out[:k, 0] = dx[near]
+    out[:k, 1] = dy[near]
+    out[:k, 2] = 1.0
+
+def observe(world, out):
+    p = world.player
+    r = p.rect
+    out[:len(PLAYER_FIELDS)] = (r.x, r.y, r.w, r.h, p.vel.x, p.vel.y, p.health, world.score,
+                                p.on_ground, p.has_hockey, p.has_laptop)
+    blocks = out[len(PLAYER_FIELDS):].reshape(len(ENTITY_KINDS), NEAREST, 3)
+    cx, cy = r.centerx, r.centery
+    for block, store in zip(blocks, (world.enemies, world.projectiles, world.collectibles)):
+        n = store.top
+        live = np.flatnonzero(store.alive[:n])
+        _nearest((store.x[live] + store.w[live] // 2 - cx).astype(np.float32),
+                 (store.y[live] + store.h[live] // 2 - cy).astype(np.float32), block)
+
+class WorldShard:
+    # a slice of the batch stepped in one process, writing straight into the shared arrays
+    def __init__(self, lo, hi, arrays, max_ticks=MAX_EPISODE_TICKS, endless=False):
+        self.lo, self.hi = lo, hi
+        self.obs, self.actions, self.rewards, self.dones = arrays
+        self.max_ticks = max_ticks
+        self.endless = endless
+        self.worlds = [None] * (hi - lo)
+        self.rngs = [None] * (hi - lo)     # per-world stream of auto-reset seeds
+        self.inputs = [game.InputState.from_mask(m) for m in range(16)]
+
+    def reset(self, seeds=None):
+        for j in range(len(self.worlds)):
+            seed = random.randrange(2**32) if seeds is None else seeds[j]
+            self.rngs[j] = random.Random(seed)
+            self._reset(j, seed)
+        self.rewards[self.lo:self.hi] = 0.0
+        self.dones[self.lo:self.hi] = False
+
+    def _reset(self, j, seed=None):
+        seed = self.rngs[j].randrange(2**32) if seed is None else seed
+        world = self.worlds[j] = game.World(seed=seed, endless=self.endless)
+        observe(world, self.obs[self.lo + j])
+
+    def step(self):
+        for j, world in enumerate(self.worlds):
+            i = self.lo + j
+            score, health = world.score, world.player.health
+            world.step(self.inputs[self.actions[i] & 15])
+            # reward: points gained, minus a point per health lost
+            self.rewards[i] = (world.score - score) + min(0, world.player.health - health)
+            done = world.status != 'running' or world.tick >= self.max_ticks
+            self.dones[i] = done
+            if done:
+                self._reset(j)
+            else:
+                observe(world, self.obs[i])
+
+# (shape, dtype) of the shared observation, action, reward and done arrays
+def _specs(n):
+    return ((n, OBS_SIZE), np.float32), ((n,), np.uint8), ((n,), np.float32), ((n,), bool)
+
+def _views(blocks, n):
+    # the arrays borrow the blocks' buffers: keep the blocks alive while they are in use
+    return [np.ndarray(shape, dtype, buffer=b.buf) for (shape, dtype), b in zip(_specs(n), blocks)]
+
+def _worker(conn, names, n, lo, hi, max_ticks, endless):
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    arrays = _views(blocks, n)
+    shard = WorldShard(lo, hi, arrays, max_ticks, endless)
+    try:
+        while True:
+            cmd, arg = conn.recv()
+            if cmd == 'step':
+                shard.step()
+            elif cmd == 'reset':
+                shard.reset(arg)
+            elif cmd == 'close':
+                break
+            conn.send(None)
+    finally:
+        del arrays, shard
+        for b in blocks:
+            b.close()
+
+class BatchEnv:
+    # num_workers=0 steps every world in this process (handy for debugging)
+    def __init__(self, num_envs, num_workers=None, max_ticks=MAX_EPISODE_TICKS, endless=False):
+        self.num_envs = num_envs
+        num_workers = os.cpu_count() if num_workers is None else num_workers
+        num_workers = min(num_workers, num_envs)
+        sizes = [int(np.prod(shape)) * np.dtype(dtype).itemsize for shape, dtype in _specs(num_envs)]
+        self.blocks = [shared_memory.SharedMemory(create=True, size=max(1, s)) for s in sizes]
+        names = [b.name for b in self.blocks]
+        self.obs, self.actions, self.rewards, self.dones = _views(self.blocks, num_envs)
+        self.local = None
+        self.conns = []
+        self.procs = []
+        if num_workers == 0:
+            arrays = (self.obs, self.actions, self.rewards, self.dones)
+            self.local = WorldShard(0, num_envs, arrays, max_ticks, endless)
+            return
+        # spawn, not fork: SDL state is not fork-safe
+        ctx = mp.get_context('spawn')
+        bounds = np.linspace(0, num_envs, num_workers + 1).astype(int)
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_worker, args=(child, names, num_envs, int(lo), int(hi),
+                                                     max_ticks, endless), daemon=True)
+            proc.start()
+            self.conns.append((parent, int(lo), int(hi)))
+            self.procs.append(proc)
+
+    def _broadcast(self, cmd, per_worker=None):
+        for k, (conn, lo, hi) in enumerate(self.conns):
+            conn.send((cmd, per_worker[k] if per_worker else None))
+        for conn, _, _ in self.conns:
+            conn.recv()
+
+    def reset(self, seeds=None):
+        seeds = None if seeds is None else list(seeds)
+        if self.local:
+            self.local.reset(seeds)
+        else:
+            self._broadcast('reset', seeds and [seeds[lo:hi] for _, lo, hi in self.conns])
+        return self.obs.copy()
+
+    def step(self, actions):
+        # -> (observations, rewards, dones), each with num_envs rows
+        self.actions[:] = actions
+        if self.local:
+            self.local.step()
+        else:
+            self._broadcast('step')
+        return self.obs.copy(), self.rewards.copy(), self.dones.copy()
+
+    def close(self):
+        for conn, _, _ in self.conns:
+            conn.send(('close', None))
+        for proc in self.procs:
+            proc.join()
+        self.conns, self.procs, self.local = [], [], None
+        del self.obs, self.actions, self.rewards, self.dones
+        for b in self.blocks:
+            b.close()
+            b.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
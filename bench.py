@@ -0,0 +1,179 @@
+"""Frame-time benchmarks for game.py.
+
+Runs scripted scenarios on the real World, Player, Enemy and projectile code with no
+frame cap and reports per-frame update / collide / render timings as percentiles.
+
+    python bench.py                          # all scenarios, table to stdout
+    python bench.py walk --out base.json     # save machine-readable results
+    python bench.py --compare base.json      # diff against an earlier run
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+if '--window' not in sys.argv:
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+import game
+
+GOD_MODE_HEALTH = 10**6   # scenarios measure frame cost, not survival
+
+# — Scenarios —
+def _floor(world):
+    # catch falls so scripted runs keep moving right instead of respawning at the start
+    world.platforms.spawn(game.Platform, 0, game.SCREEN_HEIGHT - 10, world.width, 10)
+
+def setup_walk(world):
+    _floor(world)
+
+def setup_shooters(world, count=500):
+    rng = random.Random(1)
+    world.enemies.add(*[game.HockeyEnemy(rng.randint(50, game.SCREEN_WIDTH - 50),
+                                         rng.randint(100, 520), rng.randint(40, 200),
+                                         rng.randint(1, 3))
+                        for _ in range(count)])
+
+def setup_collectibles(world, count=5000):
+    _floor(world)
+    rng = random.Random(2)
+    kinds = (game.CoinCollectible, game.SushiCollectible, game.BeerCollectible)
+    span = 2 * game.LEVEL_WIDTH
+    for _ in range(count):
+        world.collectibles.spawn(rng.choice(kinds), rng.randint(0, span), rng.randint(100, 560))
+
+def walk_right(tick):
+    return game.InputState(right=True, jump=tick % 40 < 3, shoot=tick % 30 == 0)
+
+def stand_still(tick):
+    return game.InputState()
+
+# name -> (setup, input script, ticks)
+SCENARIOS = {
+    'walk':         (setup_walk, walk_right, 3000),
+    'shooters':     (setup_shooters, stand_still, 600),
+    'collectibles': (setup_collectibles, walk_right, 600),
+}
+
+# — Timing —
+PHASES = ('update', 'collide', 'render', 'frame')
+# World.step laps folded into the reported phases
+STEP_PHASES = {'player': 'update', 'collide': 'collide', 'enemies': 'update',
+               'projectiles': 'update'}
+
+def run_scenario(name, ticks=None, render=True, render_scale=1.0):
+    setup, script, default_ticks = SCENARIOS[name]
+    ticks = ticks or default_ticks
+    world = game.World(seed=0)
+    world.player.health = GOD_MODE_HEALTH
+    setup(world)
+    if render:
+        screen = pygame.display.get_surface()
+        size = (round(game.SCREEN_WIDTH * render_scale), round(game.SCREEN_HEIGHT * render_scale))
+        renderer = game.Renderer(screen, size=size)
+        hud = game.Hud(game.get_font(None, 36))
+        backgrounds = [pygame.Surface(size) for _ in game.BACKGROUND_NAMES]
+    samples = np.zeros((ticks, len(PHASES)))
+    clock = time.perf_counter
+    row = None
+    mark = [0.0]
+
+    def lap(phase):
+        now = clock()
+        row[PHASES.index(STEP_PHASES[phase])] += now - mark[0]
+        mark[0] = now
+
+    for t in range(ticks):
+        row = samples[t]
+        start = mark[0] = clock()
+        world.step(script(t), lap)
+        if render:
+            cam = world.camera()
+            level = min(world.current_level(cam), len(backgrounds) - 1)
+            game.draw_world(renderer, hud, backgrounds[level], world, cam)
+            row[2] = clock() - mark[0]
+        row[3] = clock() - start
+        if world.status != 'running':
+            samples = samples[:t + 1]
+            break
+    return summarize(samples * 1000.0, world)
+
+def summarize(ms, world):
+    result = {'frames': len(ms), 'ticks': world.tick, 'status': world.status}
+    for i, phase in enumerate(PHASES):
+        col = ms[:, i]
+        result[phase] = {
+            'mean': float(col.mean()),
+            'p50': float(np.percentile(col, 50)),
+            'p95': float(np.percentile(col, 95)),
+            'p99': float(np.percentile(col, 99)),
+            'max': float(col.max()),
+        }
+    return result
+
+# — Reporting —
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_table(results, baseline=None):
+    print(f"{'scenario':<14}{'phase':<9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          + (f"{'Δp95':>9}" if baseline else ''))
+    for name, res in results.items():
+        for phase in PHASES:
+            st = res[phase]
+            line = f"{name:<14}{phase:<9}{st['p50']:>9.3f}{st['p95']:>9.3f}{st['p99']:>9.3f}"
+            old = (baseline or {}).get(name, {}).get(phase)
+            if old and old['p95'] > 0:
+                line += f"{(st['p95'] / old['p95'] - 1) * 100:>+8.1f}%"
+            print(line)
+        print(f"{'':<14}{res['frames']} frames, {res['status']}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('scenarios', nargs='*',
+                    help=f"scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    ap.add_argument('--ticks', type=int, help='override the per-scenario tick count')
+    ap.add_argument('--no-render', action='store_true', help='simulation only')
+    ap.add_argument('--window', action='store_true', help='render to a real window')
+    ap.add_argument('--render-scale', type=float, default=1.0,
+                    help='internal render resolution relative to the window')
+    ap.add_argument('--out', help='write results as JSON')
+    ap.add_argument('--compare', help='earlier --out file to diff against')
+    args = ap.parse_args(argv)
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            ap.error(f"unknown scenario {name!r}")
+
+    pygame.init()
+    pygame.display.set_mode((game.SCREEN_WIDTH, game.SCREEN_HEIGHT))
+    game.warm_sprite_cache()
+    results = {name: run_scenario(name, args.ticks, not args.no_render, args.render_scale)
+               for name in (args.scenarios or SCENARIOS)}
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['scenarios']
+    print_table(results, baseline)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'revision': git_revision(), 'python': platform.python_version(),
+                       'pygame': pygame.version.ver, 'machine': platform.machine(),
+                       'render': not args.no_render, 'render_scale': args.render_scale,
+                       'scenarios': results}, f, indent=2)
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
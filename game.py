@@ -1,13 +1,19 @@
 import pygame
+import numpy as np
 import sys
 import random
-
-# Global groups and score
-global pucks, notes, collectibles, score
-pucks = None
-notes = None
-collectibles = None
-score = 0
+import itertools
+import json
+import struct
+import bisect
+import heapq
+import math
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import time
+import warnings
 
 # — Constants —
 SCREEN_WIDTH = 800
@@ -24,6 +30,37 @@ SHOOT_COOLDOWN = 60
 NOTE_COOLDOWN = 20
 LEVEL_WIDTH = SCREEN_WIDTH + 100
 LEVEL_MSG_DURATION = FPS * 2
+RENDER_DIRTY = True      # repaint only changed regions while the camera is still
+RENDER_SCALE = 1.0       # internal render resolution relative to SCREEN_WIDTH x SCREEN_HEIGHT
+WINDOW_SCALE = 1.0       # window size relative to SCREEN_WIDTH x SCREEN_HEIGHT
+MAX_DIRTY_RECTS = 64     # past this many changed regions a full flip is cheaper
+TEXT_CACHE_SIZE = 256    # rendered text surfaces kept by the HUD's LRU
+PROJECTILE_CAPACITY = 1024  # initial projectile slots; the pool doubles when full
+ENEMY_CAPACITY = 256        # initial enemy slots; grows the same way
+ENTITY_CAPACITY = 256       # initial rows per static entity store; grows the same way
+INDEX_COLUMN = 128          # entity index column width in world pixels
+INDEX_MIN_ROWS = 256        # stores with fewer live rows are scanned as a plain list
+CHASE_RANGE = 300        # horizontal distance at which chasing enemies leave their patrol
+HOP_CLEARANCE = 30       # extra arc height of an enemy hop between platforms
+STREAM_RADIUS = 1        # chunks either side of the camera's chunk that are live and simulated
+STREAM_KEEP = 2          # suspended chunks within this distance keep their enemies in memory
+ENDLESS_MAX_DIFFICULTY = 3.0  # endless mode stops getting harder past this multiplier
+CHUNK_SIDS = 1024        # spawn ids reserved per endless chunk, so ids never depend on pull order
+PROFILE_FRAMES = 600     # frames of phase timings kept by the profiler ring buffer
+PROFILE_GRAPH_WIDTH = 240
+PROFILE_GRAPH_HEIGHT = 100
+PROFILE_GRAPH_EVERY = 10 # frames between overlay graph redraws
+TICK_SECONDS = 1.0 / FPS # the simulation always advances in steps of this size
+MAX_FRAME_SKIP = 4       # renders skipped in a row to catch up; beyond that the game slows
+SNAP_DISTANCE = 64       # moves longer than this in one tick (respawns, reused slots) aren't blended
+IMAGE_DIR = 'Images'
+ASSET_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')),
+                               'artifactgame')
+ASSET_WORKERS = 4
+BACKGROUND_NAMES = [
+    'highschool_bg', 'cornell_bg', 'collegetown_bg', 'lynah_bg',
+    'gym_bg', 'nyc_bg',        'workspace_bg','startup_bg'
+]
 LEVEL_MESSAGES = [
     "Back to High School!",
     "Welcome to Cornell!",
@@ -39,7 +76,7 @@ LEVEL_MESSAGES = [
 def show_message(screen, font, text, color):
     screen.fill((0, 0, 0))
     surf = font.render(text, True, color)
-    rect = surf.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
+    rect = surf.get_rect(center=screen.get_rect().center)
     screen.blit(surf, rect)
     pygame.display.flip()
     waiting = True
@@ -50,26 +87,448 @@ def show_message(screen, font, text, color):
             if e.type == pygame.KEYDOWN:
                 waiting = False
 
+# — Assets —
+class AssetLoader:
+    # decodes and scales images on a thread pool. scaled pixels are cached on disk as raw
+    # RGB keyed by file mtime and target size, so later launches skip PNG decoding.
+    # get() waits only for the image asked for; the rest keep loading in the background.
+    def __init__(self, names, size, cache_dir=ASSET_CACHE_DIR, workers=ASSET_WORKERS):
+        self.names = names
+        self.size = size
+        self.cache_dir = cache_dir
+        self.surfaces = [None] * len(names)
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.futures = [self.pool.submit(self._load, name) for name in names]
+        self.pool.shutdown(wait=False)
+
+    def _load(self, name):
+        # worker thread: returns raw RGB bytes, or an error message string
+        path = os.path.join(IMAGE_DIR, f'{name}.png')
+        w, h = self.size
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError as e:
+            return str(e)
+        prefix = f'{name}-{w}x{h}-'
+        cached = os.path.join(self.cache_dir, f'{prefix}{mtime}.rgb')
+        try:
+            with open(cached, 'rb') as f:
+                data = f.read()
+            if len(data) == w * h * 3:
+                return data
+        except OSError:
+            pass
+        try:
+            img = pygame.transform.scale(pygame.image.load(path), self.size)
+        except pygame.error as e:
+            return f'{path}: {e}'
+        data = pygame.image.tobytes(img, 'RGB')
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for old in os.listdir(self.cache_dir):
+                if old.startswith(prefix):
+                    os.remove(os.path.join(self.cache_dir, old))
+            tmp = f'{cached}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, cached)
+        except OSError:
+            pass    # a read-only cache only costs the next launch a decode
+        return data
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, idx):
+        return self.get(idx)
+
+    def get(self, idx):
+        surf = self.surfaces[idx]
+        if surf is None:
+            data = self.futures[idx].result()
+            if isinstance(data, bytes):
+                surf = pygame.image.frombytes(data, self.size, 'RGB')
+            else:
+                print(f"warning: {data}; using a plain background", file=sys.stderr)
+                surf = pygame.Surface(self.size)
+                surf.fill((150,150,150))
+            if pygame.display.get_surface() is not None:
+                surf = surf.convert()
+            self.surfaces[idx] = surf
+        return surf
+
+# — Rendering —
+class Renderer:
+    # blits the culled scene; while the camera and background stay put, only the
+    # regions whose items appeared, vanished, moved or changed image are repainted.
+    # items arrive in SCREEN_WIDTH x SCREEN_HEIGHT coordinates; with a size other than the
+    # window's, the scene is drawn to an offscreen target of that size and stretched
+    # onto the window in one pass per frame
+    def __init__(self, screen, dirty=RENDER_DIRTY, size=None):
+        self.screen = screen
+        self.dirty = dirty
+        self.size = size = tuple(size or screen.get_size())
+        self.target = screen if size == screen.get_size() else pygame.Surface(size).convert()
+        self.scale = (size[0] / SCREEN_WIDTH, size[1] / SCREEN_HEIGHT)
+        self.scaled = weakref.WeakKeyDictionary()   # image -> copy at the target's scale
+        self.prev = {}           # key -> (image, target rect) drawn last frame
+        self.prev_bg = None
+        self.prev_cam = None
+
+    def invalidate(self):
+        self.prev_bg = None
+
+    def _to_target(self, items):
+        # map logical images and rects to the target's resolution; images scale once
+        sx, sy = self.scale
+        out = []
+        for key, img, rect in items:
+            small = self.scaled.get(img)
+            if small is None:
+                w, h = img.get_size()
+                small = self.scaled[img] = pygame.transform.scale(
+                    img, (max(1, round(w * sx)), max(1, round(h * sy))))
+            out.append((key, small, pygame.Rect(round(rect.x * sx), round(rect.y * sy),
+                                                *small.get_size())))
+        return out
+
+    def _present(self, rects=None):
+        if self.target is self.screen:
+            if rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(rects)
+            return
+        pygame.transform.scale(self.target, self.screen.get_size(), self.screen)
+        pygame.display.flip()
+
+    def draw(self, background, cam, items, lap=None):
+        # items: (key, image, screen_rect) tuples in back-to-front order; the background
+        # is already at the target's size
+        if self.scale != (1.0, 1.0):
+            items = self._to_target(items)
+        target = self.target
+        current = {key: (img, rect) for key, img, rect in items}
+        full = not self.dirty or background is not self.prev_bg or cam != self.prev_cam
+        if not full:
+            prev = self.prev
+            rects = []
+            for key, (img, rect) in current.items():
+                old = prev.get(key)
+                if old is None:
+                    rects.append(rect)
+                elif old[0] is not img or old[1] != rect:
+                    rects.append(old[1])
+                    rects.append(rect)
+            for key, (img, rect) in prev.items():
+                if key not in current:
+                    rects.append(rect)
+            full = len(rects) > MAX_DIRTY_RECTS
+        self.prev = current
+        self.prev_bg = background
+        self.prev_cam = cam
+        if full:
+            target.blit(background, (0, 0))
+            if lap: lap('background')
+            for key, img, rect in items:
+                target.blit(img, rect)
+            if lap: lap('sprites')
+            self._present()
+            if lap: lap('present')
+            return
+        bounds = target.get_rect()
+        rects = [r.clip(bounds) for r in rects]
+        rects = [r for r in rects if r.w and r.h]
+        if not rects:
+            return
+        # clip each repaint to its rect: an item re-blitted in full would blend
+        # translucent pixels over themselves outside the restored background
+        boxes = [rect for _, _, rect in items]
+        for r in rects:
+            target.set_clip(r)
+            target.blit(background, r, r)
+            for i in r.collidelistall(boxes):
+                target.blit(items[i][1], boxes[i])
+        target.set_clip(None)
+        if lap: lap('sprites')
+        self._present(rects)
+        if lap: lap('present')
+
+# — HUD —
+class TextCache:
+    # LRU of rendered text surfaces keyed by (font, text, color)
+    def __init__(self, capacity=TEXT_CACHE_SIZE):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surf = self.entries.get(key)
+        if surf is None:
+            surf = self.entries[key] = font.render(text, True, color)
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(key)
+        return surf
+
+text_cache = TextCache()
+
+class DigitAtlas:
+    # glyphs for 0-9 and '-' rendered once; counters are composed from them by blitting
+    def __init__(self, font, color):
+        self.glyphs = {c: font.render(c, True, color) for c in '0123456789-'}
+        self.height = max(g.get_height() for g in self.glyphs.values())
+
+    def render(self, value):
+        glyphs = [self.glyphs[c] for c in str(value)]
+        surf = pygame.Surface((sum(g.get_width() for g in glyphs), self.height), pygame.SRCALPHA)
+        x = 0
+        for g in glyphs:
+            surf.blit(g, (x, 0))
+            x += g.get_width()
+        return surf
+
+class HudText:
+    # one HUD line bound to a value getter; its surface is rebuilt only when the value changes
+    def __init__(self, key, getter, font, color, anchor, pos, label='', digits=None):
+        self.key = key
+        self.getter = getter
+        self.font = font
+        self.color = color
+        self.anchor = anchor
+        self.pos = pos
+        self.label = label
+        self.digits = digits
+        self.value = None
+        self.image = None
+        self.rect = None
+
+    def render(self, value):
+        if self.digits is None or not isinstance(value, int):
+            return text_cache.render(self.font, f"{self.label}{value}", self.color)
+        label = text_cache.render(self.font, self.label, self.color)
+        number = self.digits.render(value)
+        surf = pygame.Surface((label.get_width() + number.get_width(),
+                               max(label.get_height(), number.get_height())), pygame.SRCALPHA)
+        surf.blit(label, (0, 0))
+        surf.blit(number, (label.get_width(), 0))
+        return surf
+
+    def item(self, source):
+        value = self.getter(source)
+        if self.image is None or value != self.value:
+            self.value = value
+            self.image = self.render(value)
+            self.rect = self.image.get_rect(**{self.anchor: self.pos})
+        return (self.key, self.image, self.rect)
+
+class Hud:
+    def __init__(self, font):
+        red, gold, white = (255, 0, 0), (255, 215, 0), (255, 255, 255)
+        self.widgets = [
+            # ── HEALTH DISPLAY ──
+            HudText('health', lambda w: w.player.health, font, red, 'topleft', (10, 10),
+                    "Health: ", DigitAtlas(font, red)),
+            # ── SCORE DISPLAY ── top-right, with a 10px margin
+            HudText('score', lambda w: w.score, font, gold, 'topright', (SCREEN_WIDTH - 10, 10),
+                    "Score: ", DigitAtlas(font, gold)),
+        ]
+        # ── LEVEL BANNER ── centered under the counters
+        self.banner = HudText('banner', lambda text: text, font, white, 'midtop', (SCREEN_WIDTH // 2, 50))
+
+    def items(self, world, banner=None):
+        items = [w.item(world) for w in self.widgets]
+        if banner:
+            items.append(self.banner.item(banner))
+        return items
+
+# — Sprite Surface Cache —
+# every sprite kind is drawn once per parameter set and the Surface is shared by all
+# instances; nothing may draw onto a cached surface (copy it first)
+SPRITE_BUILDERS = {}
+_surface_cache = {}
+_font_cache = {}
+
+def get_font(name, size):
+    font = _font_cache.get((name, size))
+    if font is None:
+        # headless callers (tests, bots, worker processes) never call pygame.init()
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = _font_cache[(name, size)] = pygame.font.Font(name, size)
+    return font
+
+def sprite_builder(kind):
+    def register(fn):
+        SPRITE_BUILDERS[kind] = fn
+        return fn
+    return register
+
+def sprite_surface(kind, *params):
+    key = (kind,) + params
+    surf = _surface_cache.get(key)
+    if surf is None:
+        surf = SPRITE_BUILDERS[kind](*params)
+        if pygame.display.get_surface() is not None:
+            # match the display pixel format so blits skip conversion
+            surf = surf.convert_alpha() if surf.get_flags() & pygame.SRCALPHA else surf.convert()
+        _surface_cache[key] = surf
+    return surf
+
+def warm_sprite_cache():
+    # call after pygame.init()/set_mode: builds every fixed-size kind up front.
+    # anything cached before the display existed is dropped so it gets converted
+    _surface_cache.clear()
+    for kind, fn in SPRITE_BUILDERS.items():
+        if fn.__code__.co_argcount == 0:
+            sprite_surface(kind)
+
+@sprite_builder('player')
+def _draw_player():
+    w, h = 30, 50
+    img = pygame.Surface((w, h), pygame.SRCALPHA)
+    pygame.draw.circle(img, (255,224,189), (w//2,8), 8)
+    pygame.draw.rect(img, (0,0,255), (w//2-5,16,10,h-16))
+    return img
+
+@sprite_builder('helmet')
+def _draw_helmet():
+    w, h = 30, 50
+    img = pygame.Surface((w,h), pygame.SRCALPHA)
+    pygame.draw.arc(img, (200,200,0), (w//2-12,0,24,16), 3.14,0,4)
+    return img
+
+@sprite_builder('guitar')
+def _draw_guitar():
+    w, h = 30, 50
+    img = pygame.Surface((w,h), pygame.SRCALPHA)
+    pygame.draw.ellipse(img, (160,82,45), (w//2-8,h//2-4,16,24))
+    pygame.draw.rect(img, (139,69,19), (w//2+6,h//2-10,4,20))
+    return img
+
+# player power-up overlays as (flag attribute, sprite kind), blitted in this order.
+# each flag combination + facing is composed once, on first use
+PLAYER_OVERLAYS = (('has_hockey', 'helmet'), ('has_guitar', 'guitar'))
+
+@sprite_builder('player_look')
+def _compose_player(flags, facing):
+    img = sprite_surface('player').copy()
+    for (attr, kind), on in zip(PLAYER_OVERLAYS, flags):
+        if on:
+            img.blit(sprite_surface(kind), (0, 0))
+    if facing < 0:
+        img = pygame.transform.flip(img, True, False)
+    return img
+
+@sprite_builder('platform')
+def _draw_platform(w, h):
+    img=pygame.Surface((w,h)); img.fill((0,200,0))
+    return img
+
+@sprite_builder('enemy')
+def _draw_enemy():
+    size=40; img=pygame.Surface((size,size)); img.fill((255,255,255)); pygame.draw.rect(img,(0,0,0),img.get_rect(),2)
+    txt=get_font(None,24).render("HW",True,(0,0,0)); img.blit(txt,txt.get_rect(center=(size//2,size//2)))
+    return img
+
+@sprite_builder('hockey_enemy')
+def _draw_hockey_enemy():
+    # red-shirt person graphic
+    size = 40
+    img = pygame.Surface((size,size), pygame.SRCALPHA)
+    pygame.draw.circle(img, (255,224,189), (size//2,8), 8)
+    pygame.draw.rect(img, (200,0,0), (size//2-10,16,20,size-16))
+    return img
+
+@sprite_builder('puck')
+def _draw_puck():
+    size=10; img=pygame.Surface((size,size),pygame.SRCALPHA)
+    pygame.draw.circle(img,(0,0,0),(size//2,size//2),size//2)
+    return img
+
+@sprite_builder('note')
+def _draw_note():
+    size=12; img=pygame.Surface((size,size),pygame.SRCALPHA)
+    pygame.draw.ellipse(img,(0,0,0),(0,0,8,12)); pygame.draw.line(img,(0,0,0),(6,2),(10,-6),2)
+    return img
+
+@sprite_builder('controller')
+def _draw_controller():
+    size = 24
+    # simple controller icon: gray rectangle + two circles as “buttons”
+    img = pygame.Surface((size, size), pygame.SRCALPHA)
+    # body
+    pygame.draw.rect(img, (100,100,100), (0, size*0.3, size, size*0.4), border_radius=6)
+    # left button
+    pygame.draw.circle(img, (200,0,0), (int(size*0.3), int(size*0.5)), 4)
+    # right button
+    pygame.draw.circle(img, (0,200,0), (int(size*0.7), int(size*0.5)), 4)
+    return img
+
+@sprite_builder('hockey_powerup')
+def _draw_hockey_powerup():
+    size = 20
+    # black puck icon
+    img = pygame.Surface((size, size), pygame.SRCALPHA)
+    pygame.draw.circle(
+        img,
+        (0, 0, 0),                  # solid black
+        (size // 2, size // 2),     # center
+        size // 2                   # radius
+    )
+    return img
+
+@sprite_builder('dumbbell')
+def _draw_dumbbell():
+    size,cap=30,8; img=pygame.Surface((size,size),pygame.SRCALPHA)
+    pygame.draw.rect(img,(80,80,80),(cap,size//2-4,size-2*cap,8)); pygame.draw.circle(img,(80,80,80),(cap,size//2),cap)
+    pygame.draw.circle(img,(80,80,80),(size-cap,size//2),cap)
+    return img
+
+@sprite_builder('guitar_powerup')
+def _draw_guitar_powerup():
+    w,h=20,20; img=pygame.Surface((w,h),pygame.SRCALPHA)
+    pygame.draw.rect(img,(139,69,19),(5,5,10,2)); pygame.draw.circle(img,(160,82,45),(10,h-5),5)
+    return img
+
+@sprite_builder('laptop')
+def _draw_laptop():
+    size=20; img=pygame.Surface((size,size),pygame.SRCALPHA)
+    pygame.draw.rect(img,(50,50,50),(0,0,size,int(size*0.6))); pygame.draw.rect(img,(80,80,80),(int(size*0.1),int(size*0.6),int(size*0.8),int(size*0.2)))
+    return img
+
+@sprite_builder('coin')
+def _draw_coin():
+    size=15; img=pygame.Surface((size,size),pygame.SRCALPHA)
+    pygame.draw.circle(img,(255,223,0),(size//2,size//2),size//2)
+    return img
+
+@sprite_builder('sushi')
+def _draw_sushi():
+    size=16; img=pygame.Surface((size,size),pygame.SRCALPHA)
+    pygame.draw.ellipse(img,(255,248,220),(0,4,size,8)); pygame.draw.rect(img,(255,69,0),(0,2,size,4))
+    return img
+
+@sprite_builder('beer')
+def _draw_beer():
+    w,h=12,20; img=pygame.Surface((w,h),pygame.SRCALPHA)
+    pygame.draw.rect(img,(255,215,0),(0,4,w,h-4)); pygame.draw.rect(img,(255,255,255),(0,0,w,6))
+    return img
+
 # — Sprite Classes —
 class Player(pygame.sprite.Sprite):
     def __init__(self, x, y):
         super().__init__()
-        w, h = 30, 50
         self.spawn = (x, y)
-        self.base_image = pygame.Surface((w, h), pygame.SRCALPHA)
-        pygame.draw.circle(self.base_image, (255,224,189), (w//2,8), 8)
-        pygame.draw.rect(self.base_image, (0,0,255), (w//2-5,16,10,h-16))
-        self.helmet = pygame.Surface((w,h), pygame.SRCALPHA)
-        pygame.draw.arc(self.helmet, (200,200,0), (w//2-12,0,24,16), 3.14,0,4)
-        self.guitar = pygame.Surface((w,h), pygame.SRCALPHA)
-        pygame.draw.ellipse(self.guitar, (160,82,45), (w//2-8,h//2-4,16,24))
-        pygame.draw.rect(self.guitar, (139,69,19), (w//2+6,h//2-10,4,20))
         self.has_hockey = False
         self.has_guitar = False
         self.has_laptop = False
         self.max_jumps = 1
         self.jumps = 0
-        self.image = self.base_image.copy()
+        self.facing = 1
+        self.look = None
+        self.refresh_image()
         self.rect = self.image.get_rect(topleft=(x,y))
         self.vel = pygame.math.Vector2(0,0)
         self.on_ground = False
@@ -77,17 +536,39 @@ class Player(pygame.sprite.Sprite):
         self.invincible_timer = 0
         self.shoot_timer = 0
         self.note_timer = 0
-        self.facing = 1
 
-    def handle_input(self):
-        keys = pygame.key.get_pressed()
+    # everything besides rect and velocity that a snapshot has to carry
+    SNAPSHOT_FIELDS = ('has_hockey', 'has_guitar', 'has_laptop', 'max_jumps', 'jumps', 'facing',
+                       'on_ground', 'health', 'invincible_timer', 'shoot_timer', 'note_timer',
+                       'spawn')
+
+    def snapshot(self):
+        return (tuple(self.rect), (self.vel.x, self.vel.y),
+                tuple(getattr(self, name) for name in self.SNAPSHOT_FIELDS))
+
+    def restore(self, saved):
+        rect, vel, fields = saved
+        self.rect.update(rect)
+        self.vel.update(vel)
+        for name, value in zip(self.SNAPSHOT_FIELDS, fields):
+            setattr(self, name, value)
+        self.refresh_image()
+
+    def handle_input(self, inp):
         self.vel.x = 0
-        if keys[pygame.K_LEFT]: self.vel.x = -PLAYER_SPEED; self.facing = -1
-        if keys[pygame.K_RIGHT]: self.vel.x = PLAYER_SPEED; self.facing = 1
-        if keys[pygame.K_SPACE]:
+        if inp.left: self.vel.x = -PLAYER_SPEED; self.facing = -1
+        if inp.right: self.vel.x = PLAYER_SPEED; self.facing = 1
+        if inp.jump:
             if self.on_ground or self.jumps < self.max_jumps:
                 self.vel.y = JUMP_VELOCITY; self.jumps += 1
 
+    def refresh_image(self):
+        # swap to the precomposed variant only when the power-ups or facing changed
+        look = (tuple(getattr(self, attr) for attr, _ in PLAYER_OVERLAYS), self.facing)
+        if look != self.look:
+            self.look = look
+            self.image = sprite_surface('player_look', *look)
+
     def apply_gravity(self):
         self.vel.y = min(self.vel.y + GRAVITY, 15)
 
@@ -96,8 +577,11 @@ class Player(pygame.sprite.Sprite):
         self.has_guitar = False
         self.max_jumps = 1
 
-    def update(self, platforms, enemies, pucks, notes, powerups, collectibles):
-        global score
+    def update(self, platforms, enemies, projectiles, powerups, collectibles, inp):
+        self.move(platforms, inp)
+        return self.interact(enemies, projectiles, powerups, collectibles, inp)
+
+    def move(self, platforms, inp):
         # timers
         if self.invincible_timer > 0:
             self.invincible_timer -= 1
@@ -106,44 +590,46 @@ class Player(pygame.sprite.Sprite):
         if self.note_timer > 0:
             self.note_timer -= 1
         # movement
-        self.handle_input()
+        self.handle_input(inp)
         self.rect.x += self.vel.x
-        for plat in pygame.sprite.spritecollide(self, platforms, False):
+        for plat in platforms.collide(self.rect):
             if self.vel.x > 0:
-                self.rect.right = plat.rect.left
+                self.rect.right = plat.left
             elif self.vel.x < 0:
-                self.rect.left = plat.rect.right
+                self.rect.left = plat.right
         self.apply_gravity()
         self.rect.y += self.vel.y
         self.on_ground = False
-        for plat in pygame.sprite.spritecollide(self, platforms, False):
+        for plat in platforms.collide(self.rect):
             if self.vel.y > 0:
-                self.rect.bottom = plat.rect.top
+                self.rect.bottom = plat.top
                 self.vel.y = 0
                 self.on_ground = True
             elif self.vel.y < 0:
-                self.rect.top = plat.rect.bottom
+                self.rect.top = plat.bottom
                 self.vel.y = 0
         if self.on_ground:
             self.jumps = 0
+
+    def interact(self, enemies, projectiles, powerups, collectibles, inp):
+        # returns the number of collectibles picked up this tick
         # power-up pickup
-        for pu in pygame.sprite.spritecollide(self, powerups, True):
-            if isinstance(pu, HockeyPowerUp):
+        for pu in powerups.take(self.rect):
+            if pu is HockeyPowerUp:
                 self.has_hockey = True
-            elif isinstance(pu, GuitarPowerUp):
+            elif pu is GuitarPowerUp:
                 self.has_guitar = True
-            elif isinstance(pu, LaptopPowerUp):
+            elif pu is LaptopPowerUp:
                 self.has_laptop = True
                 self.max_jumps = 2
-            elif isinstance(pu, GameControllerPowerUp):
+            elif pu is GameControllerPowerUp:
                 self.health += 2
         # shooting with hockey power-up
-        keys = pygame.key.get_pressed()
-        if self.has_hockey and keys[pygame.K_q] and self.shoot_timer <= 0:
-            pucks.add(Puck(self.rect.centerx, self.rect.centery, self.facing))
+        if self.has_hockey and inp.shoot and self.shoot_timer <= 0:
+            projectiles.spawn(PUCK, self.rect.centerx, self.rect.centery, self.facing)
             self.shoot_timer = SHOOT_COOLDOWN
         # collide enemies
-        for en in pygame.sprite.spritecollide(self, enemies, False):
+        for en in enemies.collide(self.rect):
             if self.vel.y > 0 and self.rect.bottom <= en.rect.top + 10:
                 en.kill()
                 self.vel.y = JUMP_VELOCITY
@@ -152,7 +638,7 @@ class Player(pygame.sprite.Sprite):
                 self.health -= 1
                 self.invincible_timer = FPS
         # collide pucks
-        for pk in pygame.sprite.spritecollide(self, pucks, True):
+        if projectiles.hit(self.rect, PUCK):
             if self.invincible_timer <= 0:
                 self.lose_powerups()
                 self.health -= 1
@@ -166,158 +652,537 @@ class Player(pygame.sprite.Sprite):
             self.rect.topleft = self.spawn
             self.vel = pygame.math.Vector2(0, 0)
         # score collectibles
-        for col in pygame.sprite.spritecollide(self, collectibles, True):
-            score += 1
+        collected = len(collectibles.take(self.rect))
         # update image overlay
-        img = self.base_image.copy()
-        if self.has_hockey:
-            img.blit(self.helmet, (0, 0))
-        if self.has_guitar:
-            img.blit(self.guitar, (0, 0))
-        self.image = img
-
-class Platform(pygame.sprite.Sprite):
-    def __init__(self,x,y,w,h):
-        super().__init__(); self.image=pygame.Surface((w,h)); self.image.fill((0,200,0)); self.rect=self.image.get_rect(topleft=(x,y))
-
-class Enemy(pygame.sprite.Sprite):
-    def __init__(self,x,y,pat,spd):
-        super().__init__(); size=40; self.image=pygame.Surface((size,size)); self.image.fill((255,255,255)); pygame.draw.rect(self.image,(0,0,0),self.image.get_rect(),2)
-        txt=pygame.font.Font(None,24).render("HW",True,(0,0,0)); self.image.blit(txt,txt.get_rect(center=(size//2,size//2)))
-        self.rect=self.image.get_rect(topleft=(x,y)); self.start_x=x; self.range=pat; self.speed=spd; self.direction=1
+        self.refresh_image()
+        return collected
+
+# — Slot Arrays —
+class SlotArrays:
+    # struct-of-arrays storage: one NumPy array per field plus an alive mask. freed slots
+    # go on a free list for reuse and the arrays double when full, so adding and removing
+    # entities never allocates per object. subclasses list their fields in FIELDS.
+    FIELDS = ()
+
+    def __init__(self, capacity):
+        for name, dtype in self.FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype))
+        self.alive = np.zeros(capacity, bool)
+        self.free = list(range(capacity - 1, -1, -1))
+        self.top = 0        # high-water mark; slots >= top have never been used
+
+    def __len__(self):
+        return int(np.count_nonzero(self.alive[:self.top]))
+
+    def _grow(self):
+        old = len(self.alive)
+        for name in [f for f, _ in self.FIELDS] + ['alive']:
+            arr = getattr(self, name)
+            grown = np.zeros(old * 2, arr.dtype)
+            grown[:old] = arr
+            setattr(self, name, grown)
+        self.free.extend(range(old * 2 - 1, old - 1, -1))
+
+    def _alloc(self, count=1):
+        if not count:
+            return np.empty(0, np.intp)
+        while len(self.free) < count:
+            self._grow()
+        idx = np.array(self.free[-count:][::-1], np.intp)
+        del self.free[-count:]
+        self.alive[idx] = True
+        self.top = max(self.top, int(idx.max()) + 1)
+        return idx
+
+    def _release(self, idx):
+        self.alive[idx] = False
+        self.free.extend(np.atleast_1d(idx).tolist())
+
+    def save(self):
+        # plain copy of the used slots, capacity and free list; load() restores them exactly
+        n = self.top
+        return (len(self.alive), n, tuple(self.free), self.alive[:n].copy(),
+                tuple(getattr(self, name)[:n].copy() for name, _ in self.FIELDS))
+
+    def load(self, saved):
+        capacity, n, free, alive, fields = saved
+        for (name, dtype), values in zip(self.FIELDS, fields):
+            if len(getattr(self, name)) != capacity:
+                setattr(self, name, np.zeros(capacity, dtype))
+            getattr(self, name)[:n] = values
+        if len(self.alive) != capacity:
+            self.alive = np.zeros(capacity, bool)
+        self.alive[:n] = alive
+        self.alive[n:] = False
+        self.free = list(free)
+        self.top = n
+
+    def _overlapping(self, rect, n):
+        return ((self.x[:n] < rect.right) & (self.x[:n] + self.w[:n] > rect.left) &
+                (self.y[:n] < rect.bottom) & (self.y[:n] + self.h[:n] > rect.top))
+
+# — Entities —
+ENTITY_GROUPS = ('platforms', 'powerups', 'collectibles')   # World attributes holding EntityStores
+
+class Entity:
+    # a type of static world object. entities are rows in an EntityStore rather than
+    # objects; a type only maps spawn args to a rect and names its shared image
+    sprite_kind = None
+
+    @classmethod
+    def image(cls, w, h):
+        return sprite_surface(cls.sprite_kind)
+
+    @classmethod
+    def rect(cls, x, y):
+        return cls.image(0, 0).get_rect(center=(x, y))
+
+class Platform(Entity):
+    sprite_kind = 'platform'
+
+    @classmethod
+    def image(cls, w, h):
+        return sprite_surface('platform', w, h)
+
+    @classmethod
+    def rect(cls, x, y, w, h):
+        return pygame.Rect(x, y, w, h)
+
+class GameControllerPowerUp(Entity): sprite_kind = 'controller'
+class HockeyPowerUp(Entity):         sprite_kind = 'hockey_powerup'
+class DumbbellPowerUp(Entity):       sprite_kind = 'dumbbell'
+class GuitarPowerUp(Entity):         sprite_kind = 'guitar_powerup'
+class LaptopPowerUp(Entity):         sprite_kind = 'laptop'
+class CoinCollectible(Entity):       sprite_kind = 'coin'
+class SushiCollectible(Entity):      sprite_kind = 'sushi'
+class BeerCollectible(Entity):       sprite_kind = 'beer'
+
+# type id stored per row -> entity type
+ENTITY_TYPES = (Platform, GameControllerPowerUp, HockeyPowerUp, DumbbellPowerUp, GuitarPowerUp,
+                LaptopPowerUp, CoinCollectible, SushiCollectible, BeerCollectible)
+for _type_id, _cls in enumerate(ENTITY_TYPES):
+    _cls.type_id = _type_id
+# level data names -> entity types
+POWERUP_TYPES = {'hockey': HockeyPowerUp, 'laptop': LaptopPowerUp, 'controller': GameControllerPowerUp}
+COLLECTIBLE_TYPES = {'coin': CoinCollectible, 'sushi': SushiCollectible, 'beer': BeerCollectible}
+
+class EntityStore(SlotArrays):
+    # one group of static entities (platforms, power-ups or collectibles): type, rect,
+    # streaming chunk, spawn id and insertion order per row, about 30 bytes each.
+    # hit tests and culling search a sorted index (x column, then y) for the rows that can
+    # reach the query rect and mask only those, so their cost tracks what is nearby rather
+    # than the store's size; results come back in insertion order, as a sprite group would
+    FIELDS = (('type', np.uint8), ('x', np.int32), ('y', np.int32), ('w', np.int32),
+              ('h', np.int32), ('chunk', np.int32), ('sid', np.int32), ('seq', np.int32))
+
+    def __init__(self, capacity=ENTITY_CAPACITY):
+        super().__init__(capacity)
+        self.counter = 0
+        self.images = {}    # type, or (type, size) for platforms -> shared image
+        self.index = None   # (sorted slots, their keys, widest w, tallest h); rebuilt after spawns
+
+    def spawn(self, cls, *args, chunk=-1, sid=-1):
+        i = int(self._alloc()[0])
+        self.type[i] = cls.type_id
+        self.x[i], self.y[i], self.w[i], self.h[i] = cls.rect(*args)
+        self.chunk[i], self.sid[i], self.seq[i] = chunk, sid, self.counter
+        self.counter += 1
+        self.index = None
+        return i
+
+    @staticmethod
+    def _keys(col, y):
+        return (np.asarray(col, np.int64) << 32) + (np.asarray(y, np.int64) + 2**31)
+
+    def _index(self):
+        # rows are static, so the index only goes stale when rows are added; removed
+        # rows stay in it and are skipped by the alive check. small stores (every campaign
+        # chunk) keep a plain list of rows in insertion order: scanning a few dozen tuples
+        # is cheaper than a single NumPy call
+        if self.index is None:
+            idx = np.flatnonzero(self.alive[:self.top])
+            if len(idx) < INDEX_MIN_ROWS:
+                idx = idx[np.argsort(self.seq[idx])]
+                self.index = list(zip(idx.tolist(), self.type[idx].tolist(), self.x[idx].tolist(),
+                                      self.y[idx].tolist(), self.w[idx].tolist(),
+                                      self.h[idx].tolist()))
+            else:
+                keys = self._keys(self.x[idx] // INDEX_COLUMN, self.y[idx])
+                order = np.argsort(keys, kind='stable')
+                self.index = (idx[order], keys[order], int(self.w[idx].max()),
+                              int(self.h[idx].max()))
+        return self.index
+
+    def _hits(self, rect):
+        # (slot, type, x, y, w, h) of the live rows overlapping rect, in insertion order
+        index = self._index()
+        left, top, right, bottom = rect.left, rect.top, rect.right, rect.bottom
+        alive = self.alive
+        if type(index) is list:
+            return [row for row in index
+                    if row[2] < right and row[2] + row[4] > left and row[3] < bottom
+                    and row[3] + row[5] > top and alive[row[0]]]
+        # only rows with x in [left - widest, right) and y in [top - tallest, bottom) can
+        # overlap rect: one key range per column the x span covers
+        order, keys, widest, tallest = index
+        cols = np.arange((left - widest) // INDEX_COLUMN, (right - 1) // INDEX_COLUMN + 1)
+        lo = np.searchsorted(keys, self._keys(cols, top - tallest))
+        hi = np.searchsorted(keys, self._keys(cols, bottom))
+        idx = np.concatenate([order[a:b] for a, b in zip(lo.tolist(), hi.tolist()) if b > a]
+                             or [order[:0]])
+        x, y = self.x[idx], self.y[idx]
+        idx = idx[alive[idx] & (x < right) & (x + self.w[idx] > left) &
+                  (y < bottom) & (y + self.h[idx] > top)]
+        if len(idx) > 1:
+            idx = idx[np.argsort(self.seq[idx])]
+        return list(zip(idx.tolist(), self.type[idx].tolist(), self.x[idx].tolist(),
+                        self.y[idx].tolist(), self.w[idx].tolist(), self.h[idx].tolist()))
+
+    def __iter__(self):
+        # (type, rect) of every live entity, in insertion order
+        idx = np.flatnonzero(self.alive[:self.top])
+        idx = idx[np.argsort(self.seq[idx])]
+        return iter([(ENTITY_TYPES[t], pygame.Rect(*r)) for t, *r in
+                     zip(self.type[idx].tolist(), self.x[idx].tolist(), self.y[idx].tolist(),
+                         self.w[idx].tolist(), self.h[idx].tolist())])
+
+    def collide(self, rect):
+        return [pygame.Rect(row[2:]) for row in self._hits(rect)]
+
+    def take(self, rect):
+        # remove everything overlapping rect; returns the types taken
+        hits = self._hits(rect)
+        if not hits:
+            return []
+        self._release([row[0] for row in hits])
+        return [ENTITY_TYPES[row[1]] for row in hits]
+
+    def visible(self, view):
+        # (slot, image, rect) for live entities overlapping the view, in draw order
+        images = self.images
+        out = []
+        for i, t, x, y, w, h in self._hits(view):
+            img = images.get(t) or images.get((t, (w, h)))
+            if img is None:
+                img = ENTITY_TYPES[t].image(w, h)
+                # only platforms differ in size; every other type shares one image
+                images[(t, (w, h)) if ENTITY_TYPES[t] is Platform else t] = img
+            out.append((i, img, pygame.Rect(x, y, w, h)))
+        return out
+
+    def suspend(self, chunk):
+        # remove the chunk's rows; returns the spawn ids still alive
+        n = self.top
+        idx = np.flatnonzero(self.alive[:n] & (self.chunk[:n] == chunk))
+        self._release(idx)
+        return self.sid[idx].tolist()
+
+    def save(self):
+        # the index is replaced, never written, so a snapshot can share it
+        return super().save(), self.counter, self._index()
+
+    def load(self, saved):
+        super().load(saved[0])
+        self.counter, self.index = saved[1], saved[2]
+
+# — Projectiles —
+# kind id -> (sprite kind, speed, lifetime)
+PUCK, NOTE = 0, 1
+PROJECTILE_SPECS = (('puck', PUCK_SPEED, PUCK_LIFETIME), ('note', NOTE_SPEED, NOTE_LIFETIME))
+
+class ProjectilePool(SlotArrays):
+    # every projectile is a slot (rect left/top, size, x velocity, lifetime, kind);
+    # movement, expiry and hit tests are single vectorized passes
+    FIELDS = (('x', np.int32), ('y', np.int32), ('w', np.int32), ('h', np.int32),
+              ('vx', np.int32), ('life', np.int32), ('kind', np.uint8))
+
+    def __init__(self, capacity=PROJECTILE_CAPACITY):
+        super().__init__(capacity)
+        self.sizes = None
+
+    def spawn(self, kind, cx, cy, d):
+        return self.spawn_many(kind, np.array([cx]), np.array([cy]), np.array([d]))[0]
+
+    def spawn_many(self, kind, cx, cy, d):
+        if self.sizes is None:
+            self.sizes = [sprite_surface(spec[0]).get_size() for spec in PROJECTILE_SPECS]
+        idx = self._alloc(len(cx))
+        w, h = self.sizes[kind]
+        _, speed, lifetime = PROJECTILE_SPECS[kind]
+        # same placement as image.get_rect(center=(cx, cy))
+        self.x[idx] = cx - w // 2
+        self.y[idx] = cy - h // 2
+        self.w[idx] = w
+        self.h[idx] = h
+        self.vx[idx] = speed * d
+        self.life[idx] = lifetime
+        self.kind[idx] = kind
+        return idx
+
+    def _release(self, idx):
+        self.vx[idx] = 0
+        super()._release(idx)
+
     def update(self):
-        self.rect.x+=self.speed*self.direction
-        if self.rect.x<self.start_x or self.rect.x>self.start_x+self.range: self.direction*=-1
+        n = self.top
+        alive = self.alive[:n]
+        self.x[:n] += self.vx[:n]
+        self.life[:n] -= alive
+        self._release(np.flatnonzero(alive & (self.life[:n] <= 0)))
 
-class HockeyEnemy(Enemy):
+    def hit(self, rect, kind):
+        # removes every live projectile of this kind touching rect; returns how many
+        n = self.top
+        idx = np.flatnonzero(self.alive[:n] & (self.kind[:n] == kind) & self._overlapping(rect, n))
+        self._release(idx)
+        return len(idx)
+
+    def visible(self, view):
+        # (slot, image, world rect) for live projectiles inside the camera window
+        n = self.top
+        idx = np.flatnonzero(self.alive[:n] & self._overlapping(view, n))
+        images = [sprite_surface(spec[0]) for spec in PROJECTILE_SPECS]
+        x, y, w, h, kind = self.x, self.y, self.w, self.h, self.kind
+        return [(i, images[kind[i]], pygame.Rect(int(x[i]), int(y[i]), int(w[i]), int(h[i])))
+                for i in idx.tolist()]
+
+# — Navigation —
+def jump_reach(rise):
+    # horizontal distance covered by a full jump that lands `rise` px higher (negative: lower),
+    # or None when the jump apex cannot get that high
+    v = -JUMP_VELOCITY
+    if rise > v * v / (2 * GRAVITY):
+        return None
+    airtime = (v + math.sqrt(v * v - 2 * GRAVITY * rise)) / GRAVITY
+    return PLAYER_SPEED * airtime, airtime
+
+class NavGraph:
+    # platforms of one chunk as nodes. edges join platforms that touch at the same height
+    # (walk) or that a jump can reach given GRAVITY, JUMP_VELOCITY and PLAYER_SPEED.
+    # shortest-path routes are cached per target platform.
+    def __init__(self, rects):
+        self.rects = rects
+        self.left = np.array([r.left for r in rects], np.int32)
+        self.right = np.array([r.right for r in rects], np.int32)
+        self.top = np.array([r.top for r in rects], np.int32)
+        self.edges = [[] for _ in rects]    # node -> [(dest, cost, takeoff cx, landing cx, ticks)]
+        for a, ra in enumerate(rects):
+            for b, rb in enumerate(rects):
+                if a != b:
+                    edge = self._edge(ra, rb)
+                    if edge:
+                        self.edges[a].append((b,) + edge)
+        self.routes = {}
+
+    @staticmethod
+    def _edge(ra, rb):
+        gap = max(0, rb.left - ra.right, ra.left - rb.right)
+        # nearest point of a towards b, then nearest point of b to that
+        takeoff = min(max(rb.centerx, ra.left), ra.right - 1)
+        landing = min(max(takeoff, rb.left), rb.right - 1)
+        if ra.top == rb.top and gap == 0:
+            return abs(landing - takeoff), takeoff, landing, 0
+        reach = jump_reach(ra.top - rb.top)
+        if reach is None or gap > reach[0]:
+            return None
+        ticks = max(1, math.ceil(reach[1]))
+        return abs(landing - takeoff) + abs(ra.top - rb.top) + ticks, takeoff, landing, ticks
+
+    def node_at(self, rect):
+        # platform the rect is standing on, or -1
+        hits = np.flatnonzero((self.top == rect.bottom) & (self.left < rect.right) &
+                              (self.right > rect.left))
+        return int(hits[0]) if len(hits) else -1
+
+    def route(self, target):
+        # per node: next platform towards target (-1 when unreachable or already there),
+        # with the takeoff/landing center x and hop duration of that edge
+        route = self.routes.get(target)
+        if route is None:
+            n = len(self.rects)
+            dist = [math.inf] * n
+            dist[target] = 0
+            heap = [(0, target)]
+            incoming = [[] for _ in range(n)]
+            for a, edges in enumerate(self.edges):
+                for b, cost, *_ in edges:
+                    incoming[b].append((a, cost))
+            while heap:
+                d, b = heapq.heappop(heap)
+                if d > dist[b]:
+                    continue
+                for a, cost in incoming[b]:
+                    if d + cost < dist[a]:
+                        dist[a] = d + cost
+                        heapq.heappush(heap, (d + cost, a))
+            route = np.full((4, n), -1, np.int32)   # next hop, takeoff, landing, ticks
+            for a, edges in enumerate(self.edges):
+                best = math.inf
+                for b, cost, takeoff, landing, ticks in edges:
+                    if a != target and cost + dist[b] < best:
+                        best = cost + dist[b]
+                        route[:, a] = (b, takeoff, landing, ticks)
+            route = self.routes[target] = route
+        return route
+
+# — Enemies —
+class EnemySystem(SlotArrays):
+    # patrol, pursuit and shooting state for every live enemy in contiguous arrays;
+    # update() steps them all in one vectorized pass. Enemy objects are thin views used
+    # for streaming, stomping and rendering.
+    FIELDS = (('x', np.int32), ('y', np.int32), ('w', np.int32), ('h', np.int32),
+              ('start_x', np.int32), ('range', np.int32), ('speed', np.int32),
+              ('direction', np.int32), ('shoot_timer', np.int32), ('shooter', bool),
+              # pursuit: nav chunk and platform node (-1: none), and the hop in flight
+              ('chase', bool), ('chunk', np.int32), ('node', np.int32),
+              ('hop_left', np.int32), ('hop_total', np.int32), ('hop_x0', np.int32),
+              ('hop_y0', np.int32), ('hop_x1', np.int32), ('hop_y1', np.int32))
+
+    def __init__(self, capacity=ENEMY_CAPACITY):
+        super().__init__(capacity)
+        self.views = {}     # slot -> Enemy
+
+    def __iter__(self):
+        return iter(list(self.views.values()))
+
+    def add(self, *enemies):
+        for en in enemies:
+            i = int(self._alloc()[0])
+            for name, value in en.state.items():
+                getattr(self, name)[i] = value
+            self.views[i] = en
+            en.system, en.slot = self, i
+
+    def remove(self, *enemies):
+        # detach, keeping the full row on the view so it resumes where it stopped
+        for en in enemies:
+            i = en.slot
+            en.state = self.row(i)
+            self.speed[i] = 0
+            self._release(i)
+            del self.views[i]
+            en.system = en.slot = None
+
+    def row(self, i):
+        return {name: getattr(self, name)[i].item() for name, _ in self.FIELDS}
+
+    def load(self, saved, views=None):
+        # views: slot -> Enemy to attach to the restored rows
+        for en in self.views.values():
+            en.system = en.slot = None
+        super().load(saved)
+        self.views = dict(views or {})
+        for i, en in self.views.items():
+            en.system, en.slot = self, i
+
+    def update(self, projectiles, pursuit=None):
+        # pursuit: (chunk, player node, player center x, NavGraph, route) or None
+        n = self.top
+        alive = self.alive[:n]
+        x, y, w, h = self.x[:n], self.y[:n], self.w[:n], self.h[:n]
+        direction, speed = self.direction[:n], self.speed[:n]
+        hop_left = self.hop_left[:n]
+        airborne = alive & (hop_left > 0)
+        chasing = np.zeros(n, bool)
+        if pursuit is not None:
+            chunk, target, px, graph, route = pursuit
+            node = self.node[:n]
+            near = np.flatnonzero(alive & self.chase[:n] & ~airborne & (self.chunk[:n] == chunk) &
+                                  (node >= 0) & (np.abs(x + w // 2 - px) <= CHASE_RANGE))
+            # only enemies that are on the player's platform or have a route to it
+            chasing[near] = (node[near] == target) | (route[0][node[near]] >= 0)
+        patrol = alive & ~airborne & ~chasing
+        # patrol step, heading back into [start_x, start_x + range] once outside it
+        x += speed * direction * patrol
+        start = self.start_x[:n]
+        direction[patrol & (x < start)] = 1
+        direction[patrol & (x > start + self.range[:n])] = -1
+        if chasing.any():
+            self._chase(np.flatnonzero(chasing), pursuit)
+        if airborne.any():
+            self._hop(np.flatnonzero(airborne))
+        # shooters fire a puck from their center every SHOOT_COOLDOWN ticks
+        shooting = alive & self.shooter[:n]
+        timer = self.shoot_timer[:n]
+        timer -= shooting
+        fire = np.flatnonzero(shooting & (timer <= 0))
+        if len(fire):
+            projectiles.spawn_many(PUCK, x[fire] + w[fire] // 2,
+                                   y[fire] + h[fire] // 2, direction[fire])
+            timer[fire] = SHOOT_COOLDOWN
+
+    def _chase(self, idx, pursuit):
+        # walk towards the player on the same platform, else towards the cached route's
+        # takeoff point, and hop to the next platform once there
+        _, target, px, graph, route = pursuit
+        node = self.node[idx]
+        half = self.w[idx] // 2
+        same = node == target
+        goal = np.where(same, np.clip(px, graph.left[node] + half, graph.right[node] - half),
+                        route[1][node])
+        delta = goal - (self.x[idx] + half)
+        step = np.clip(delta, -self.speed[idx], self.speed[idx])
+        self.x[idx] += step
+        moving = step != 0
+        self.direction[idx[moving]] = np.sign(step[moving])
+        launch = idx[~same & (np.abs(delta) <= self.speed[idx])]
+        if len(launch):
+            hop_node = self.node[launch]
+            self.hop_x0[launch] = self.x[launch]
+            self.hop_y0[launch] = self.y[launch]
+            self.hop_x1[launch] = route[2][hop_node] - self.w[launch] // 2
+            self.hop_y1[launch] = graph.top[route[0][hop_node]] - self.h[launch]
+            self.hop_total[launch] = self.hop_left[launch] = route[3][hop_node]
+            self.node[launch] = route[0][hop_node]
+            # patrol resumes around wherever the hop lands
+            self.start_x[launch] = self.hop_x1[launch]
+
+    def _hop(self, idx):
+        self.hop_left[idx] -= 1
+        total = self.hop_total[idx]
+        t = (total - self.hop_left[idx]) / total
+        x0, y0, x1, y1 = self.hop_x0[idx], self.hop_y0[idx], self.hop_x1[idx], self.hop_y1[idx]
+        arc = np.maximum(y0 - y1, 0) + HOP_CLEARANCE
+        self.x[idx] = np.rint(x0 + (x1 - x0) * t)
+        self.y[idx] = np.rint(y0 + (y1 - y0) * t - 4 * arc * t * (1 - t))
+
+    def collide(self, rect):
+        n = self.top
+        idx = np.flatnonzero(self.alive[:n] & self._overlapping(rect, n))
+        return [self.views[i] for i in idx.tolist()]
+
+    def visible(self, view):
+        return self.collide(view)
+
+class Enemy:
+    # view of one EnemySystem slot; detached views carry their row for streaming
+    sprite_kind = 'enemy'
+    shooter = False
+    chases = True
     def __init__(self,x,y,pat,spd):
-        super().__init__(x,y,pat,spd)
-        self.shoot_timer=SHOOT_COOLDOWN
-        # red-shirt person graphic
-        size = 40
-        self.image = pygame.Surface((size,size), pygame.SRCALPHA)
-        pygame.draw.circle(self.image, (255,224,189), (size//2,8), 8)
-        pygame.draw.rect(self.image, (200,0,0), (size//2-10,16,20,size-16))
-        self.rect = self.image.get_rect(topleft=(x,y))
-    def update(self):
-        super().update(); self.shoot_timer-=1
-        if self.shoot_timer<=0: pucks.add(Puck(self.rect.centerx,self.rect.centery,self.direction)); self.shoot_timer=SHOOT_COOLDOWN
-
-class Puck(pygame.sprite.Sprite):
-    def __init__(self,x,y,d):
-        super().__init__(); size=10; self.image=pygame.Surface((size,size),pygame.SRCALPHA)
-        pygame.draw.circle(self.image,(0,0,0),(size//2,size//2),size//2)
-        self.rect=self.image.get_rect(center=(x,y)); self.vel=pygame.math.Vector2(PUCK_SPEED*d,0); self.lifetime=PUCK_LIFETIME
-    def update(self): 
-        self.rect.x+=self.vel.x; self.lifetime-=1; 
-        if self.lifetime<=0: self.kill()
-
-class MusicNote(pygame.sprite.Sprite):
-    def __init__(self,x,y,d):
-        super().__init__(); size=12; self.image=pygame.Surface((size,size),pygame.SRCALPHA)
-        pygame.draw.ellipse(self.image,(0,0,0),(0,0,8,12)); pygame.draw.line(self.image,(0,0,0),(6,2),(10,-6),2)
-        self.rect=self.image.get_rect(center=(x,y)); self.vel=pygame.math.Vector2(NOTE_SPEED*d,0); self.lifetime=NOTE_LIFETIME
-    def update(self):
-        self.rect.x+=self.vel.x; self.lifetime-=1
-        if self.lifetime<=0: self.kill()
+        self.image=sprite_surface(self.sprite_kind); w,h=self.image.get_size()
+        self.state=dict(x=x,y=y,w=w,h=h,start_x=x,range=pat,speed=spd,direction=1,
+                        shoot_timer=SHOOT_COOLDOWN,shooter=self.shooter,chase=self.chases,
+                        chunk=-1,node=-1,hop_left=0,hop_total=0,hop_x0=0,hop_y0=0,hop_x1=0,hop_y1=0)
+        self.system=None; self.slot=None
+    @property
+    def rect(self):
+        if self.system is None:
+            return pygame.Rect(self.state['x'],self.state['y'],self.state['w'],self.state['h'])
+        s,i=self.system,self.slot; return pygame.Rect(int(s.x[i]),int(s.y[i]),int(s.w[i]),int(s.h[i]))
+    def alive(self): return self.system is not None
+    def kill(self):
+        if self.system is not None: self.system.remove(self)
 
-class GameControllerPowerUp(pygame.sprite.Sprite):
-    def __init__(self, x, y):
-        super().__init__()
-        size = 24
-        # simple controller icon: gray rectangle + two circles as “buttons”
-        self.image = pygame.Surface((size, size), pygame.SRCALPHA)
-        # body
-        pygame.draw.rect(self.image, (100,100,100), (0, size*0.3, size, size*0.4), border_radius=6)
-        # left button
-        pygame.draw.circle(self.image, (200,0,0), (int(size*0.3), int(size*0.5)), 4)
-        # right button
-        pygame.draw.circle(self.image, (0,200,0), (int(size*0.7), int(size*0.5)), 4)
-        self.rect = self.image.get_rect(center=(x, y))
-
-class HockeyPowerUp(pygame.sprite.Sprite):
-    def __init__(self, x, y):
-        super().__init__()
-        size = 20
-        # black puck icon
-        self.image = pygame.Surface((size, size), pygame.SRCALPHA)
-        pygame.draw.circle(
-            self.image,
-            (0, 0, 0),                  # solid black
-            (size // 2, size // 2),     # center
-            size // 2                   # radius
-        )
-        self.rect = self.image.get_rect(center=(x, y))
-
-class DumbbellPowerUp(pygame.sprite.Sprite):
-    def __init__(self,x,y): 
-      super().__init__(); size,cap=30,8; self.image=pygame.Surface((size,size),pygame.SRCALPHA)
-      pygame.draw.rect(self.image,(80,80,80),(cap,size//2-4,size-2*cap,8)); pygame.draw.circle(self.image,(80,80,80),(cap,size//2),cap)
-      pygame.draw.circle(self.image,(80,80,80),(size-cap,size//2),cap); self.rect=self.image.get_rect(center=(x,y))
-
-class GuitarPowerUp(pygame.sprite.Sprite):
-    def __init__(self,x,y): 
-        super().__init__(); w,h=20,20; self.image=pygame.Surface((w,h),pygame.SRCALPHA)
-        pygame.draw.rect(self.image,(139,69,19),(5,5,10,2)); pygame.draw.circle(self.image,(160,82,45),(10,h-5),5)
-        self.rect=self.image.get_rect(center=(x,y))
-
-class LaptopPowerUp(pygame.sprite.Sprite):
-    def __init__(self,x,y): 
-        super().__init__(); size=20; self.image=pygame.Surface((size,size),pygame.SRCALPHA)
-        pygame.draw.rect(self.image,(50,50,50),(0,0,size,int(size*0.6))); pygame.draw.rect(self.image,(80,80,80),(int(size*0.1),int(size*0.6),int(size*0.8),int(size*0.2)))
-        self.rect=self.image.get_rect(center=(x,y))
-
-class CoinCollectible(pygame.sprite.Sprite):
-    def __init__(self,x,y):
-        super().__init__(); size=15; self.image=pygame.Surface((size,size),pygame.SRCALPHA)
-        pygame.draw.circle(self.image,(255,223,0),(size//2,size//2),size//2); self.rect=self.image.get_rect(center=(x,y))
-
-class SushiCollectible(pygame.sprite.Sprite):
-    def __init__(self,x,y):
-        super().__init__(); size=16; self.image=pygame.Surface((size,size),pygame.SRCALPHA)
-        pygame.draw.ellipse(self.image,(255,248,220),(0,4,size,8)); pygame.draw.rect(self.image,(255,69,0),(0,2,size,4))
-        self.rect=self.image.get_rect(center=(x,y))
-
-class BeerCollectible(pygame.sprite.Sprite):
-    def __init__(self,x,y): 
-        super().__init__(); w,h=12,20; self.image=pygame.Surface((w,h),pygame.SRCALPHA)
-        pygame.draw.rect(self.image,(255,215,0),(0,4,w,h-4)); pygame.draw.rect(self.image,(255,255,255),(0,0,w,6))
-        self.rect=self.image.get_rect(center=(x,y))
+class HockeyEnemy(Enemy):
+    # red-shirt person that shoots pucks and holds its patrol
+    sprite_kind = 'hockey_enemy'
+    shooter = True
+    chases = False
 
-# — Main Game Loop —
-def main():
-    global pucks, notes, collectibles, score
-    pygame.init()
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption("2D Platformer")
-    clock = pygame.time.Clock()
-    font_small = pygame.font.Font(None, 36)
-    big_font   = pygame.font.Font(None, 72)
-
-    platforms    = pygame.sprite.Group()
-    enemies      = pygame.sprite.Group()
-    pucks        = pygame.sprite.Group()
-    notes        = pygame.sprite.Group()
-    powerups     = pygame.sprite.Group()
-    collectibles = pygame.sprite.Group()
-
-    # Load backgrounds
-    bg_names = [
-        'highschool_bg', 'cornell_bg', 'collegetown_bg', 'lynah_bg',
-        'gym_bg', 'nyc_bg',        'workspace_bg','startup_bg'
-    ]
-    backgrounds = []
-    for name in bg_names:
-        try:
-            img = pygame.image.load(f'Images/{name}.png').convert()
-        except:
-            img = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            img.fill((150,150,150))
-        backgrounds.append(pygame.transform.scale(img, (SCREEN_WIDTH, SCREEN_HEIGHT)))
-
-    # Define all levels
-    gap = 30
-    levels = [
+# — Level Data —
+def make_levels(gap=30):
+    return [
         # 1: High School
         {'platforms': [(0,560,SCREEN_WIDTH-gap,40), (200,450,120,10), (400,380,100,10)],
          'enemies': [(500,520,150,2), (300,480,80,1)],
@@ -360,123 +1225,821 @@ def main():
          'collectibles': [(7*SCREEN_WIDTH+150,500,'beer'), (7*SCREEN_WIDTH+350,480,'coin')]}
     ]
 
-    # spawn
-    for idx, lvl in enumerate(levels):
-        xoff = idx * LEVEL_WIDTH
-        for x,y,w,h in lvl['platforms']:
-            platforms.add(Platform(xoff+x,y,w,h))
-        for x,y,pat,spd in lvl['enemies']:
-            enemies.add(Enemy(xoff+x,y,pat,spd))
-            enemies.add(HockeyEnemy(xoff+x+80,y,pat,spd))
-        for x,y,t in lvl['powerups']:
-            if t=='hockey': powerups.add(HockeyPowerUp(xoff+x,y))
-            if t=='laptop': powerups.add(LaptopPowerUp(xoff+x,y))
-            if t == 'controller':powerups.add(GameControllerPowerUp(xoff + x, y))
-        for x,y,c in lvl['collectibles']:
-            if c=='coin': collectibles.add(CoinCollectible(xoff+x,y))
-            if c=='sushi': collectibles.add(SushiCollectible(xoff+x,y))
-            if c=='beer': collectibles.add(BeerCollectible(xoff+x,y))
-    for idx in range(len(levels)):
-      xoff = idx * LEVEL_WIDTH
-      level_left  = xoff + 50
-      level_right = xoff + LEVEL_WIDTH - 50
-      level_top   = 100
-      level_bottom= SCREEN_HEIGHT - 100
-      # spawn 3 extra random power‑ups per level
-      for _ in range(3):
-        pu_type = random.choice(['hockey', 'laptop', 'controller'])
-        x = random.randint(level_left, level_right)
-        y = random.randint(level_top, level_bottom)
-        if pu_type == 'hockey':
-            powerups.add(HockeyPowerUp(x, y))
-        elif pu_type == 'laptop':
-            powerups.add(LaptopPowerUp(x, y))
+# procedural chunks for endless mode, as level-style specs in world coordinates
+# ('shooters' lists hockey enemies separately, since nothing here spawns in pairs)
+
+def endless_chunk(seed, idx):
+    # the spec for chunk idx on its own: it has its own rng, so any chunk can be rebuilt
+    # later without replaying the ones before it
+    rng = random.Random((seed << 32) | idx)
+    diff = min(1 + idx * 0.1, ENDLESS_MAX_DIFFICULTY)
+    left, right = idx * LEVEL_WIDTH, (idx + 1) * LEVEL_WIDTH
+    spec = {'platforms': [], 'enemies': [], 'shooters': [], 'powerups': [], 'collectibles': []}
+    # floor runs that shorten, and gaps that widen, as difficulty grows; every gap stays
+    # well inside a running jump, runs stay long enough to land a full jump on, and
+    # every chunk starts on solid ground
+    max_gap = min(int(40 * diff) + 20, int(jump_reach(0)[0] * 0.6))
+    runs, x = [], left
+    while x < right:
+        w = max(200, int(rng.randint(300, 460) / diff))
+        if right - (x + w) < 120:
+            w = right - x       # no slivers at the chunk's end
+        runs.append((x, w))
+        spec['platforms'].append((x, 560, w, 40))
+        x += w + rng.randint(50, max_gap)
+    # ledges low enough to reach from the floor, with something on top of most of them.
+    # they sit inside a floor run, clear of its ends and of each other, so no ledge is a
+    # ceiling over a gap's takeoff
+    ledges = []
+    for _ in range(rng.randint(2, 3)):
+        w = max(50, int(rng.randint(100, 160) / diff ** 0.5))
+        sx, sw = rng.choice(runs)
+        if sw < w + 100:
+            continue
+        px, py = rng.randint(sx + 40, sx + sw - w - 60), rng.randint(440, 480)
+        if any(px < lx + lw + 40 and lx < px + w + 40 for lx, lw in ledges):
+            continue
+        ledges.append((px, w))
+        spec['platforms'].append((px, py, w, 10))
+        if rng.random() < 0.6:
+            spec['collectibles'].append((px + w // 2, py - 25, rng.choice(('coin', 'sushi', 'beer'))))
+    # enemies patrol floor runs wide enough to hold them, never the spawn run of chunk 0
+    for sx, sw in runs[1 if idx == 0 else 0:]:
+        if sw >= 160 and rng.random() < min(0.4 * diff, 0.9):
+            pat = min(int(rng.randint(60, 120) * diff), sw - 40)
+            ex = rng.randint(sx, sx + sw - 40 - pat)
+            spd = min(max(1, int(rng.randint(1, 2) * diff)), 5)
+            kind = 'shooters' if rng.random() < min(0.15 * diff, 0.5) else 'enemies'
+            spec[kind].append((ex, 520, pat, spd))
+    if rng.random() < 0.5:
+        spec['powerups'].append((rng.randint(left + 50, right - 50), 520,
+                                 rng.choice(('hockey', 'laptop', 'controller'))))
+    for _ in range(rng.randint(3, 5)):
+        sx, sw = rng.choice(runs)
+        spec['collectibles'].append((sx + rng.randrange(sw), 530, rng.choice(('coin', 'sushi', 'beer'))))
+    return spec
+
+def endless_chunks(seed, start=0):
+    # lazy, unbounded stream of (index, spec); the world pulls from it as the camera advances
+    for idx in itertools.count(start):
+        yield idx, endless_chunk(seed, idx)
+
+# — Input —
+# InputState bits for recordings
+INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP, INPUT_SHOOT = 1, 2, 4, 8
+
+class InputState:
+    def __init__(self, left=False, right=False, jump=False, shoot=False):
+        self.left = left
+        self.right = right
+        self.jump = jump
+        self.shoot = shoot
+
+    @property
+    def mask(self):
+        return ((INPUT_LEFT if self.left else 0) | (INPUT_RIGHT if self.right else 0) |
+                (INPUT_JUMP if self.jump else 0) | (INPUT_SHOOT if self.shoot else 0))
+
+    @classmethod
+    def from_mask(cls, mask):
+        return cls(bool(mask & INPUT_LEFT), bool(mask & INPUT_RIGHT),
+                   bool(mask & INPUT_JUMP), bool(mask & INPUT_SHOOT))
+
+class KeyboardInput:
+    # live keys; a KEYDOWN on Q also counts so taps shorter than a frame still shoot
+    def poll(self, tick, events=()):
+        keys = pygame.key.get_pressed()
+        tapped = any(e.type == pygame.KEYDOWN and e.key == pygame.K_q for e in events)
+        return InputState(keys[pygame.K_LEFT], keys[pygame.K_RIGHT],
+                          keys[pygame.K_SPACE], keys[pygame.K_q] or tapped)
+
+class ScriptedInput:
+    # feeds InputStates from a function of the tick number (bots, tests, balancing)
+    def __init__(self, script):
+        self.script = script
+    def poll(self, tick, events=()):
+        return self.script(tick)
+
+def run_right_and_hop(tick):
+    return InputState(right=True, jump=tick % 40 < 3, shoot=tick % 30 == 0)
+
+# — Replays —
+# file: magic, version, seed, mode, then the end-of-run digest, then (mask, run length) pairs
+# with run lengths as LEB128 varints. held keys compress to a few bytes per second.
+REPLAY_MAGIC = b'AGRP'
+REPLAY_VERSION = 2
+REPLAY_HEADER = struct.Struct('<4sBQB')      # magic, version, seed, endless
+REPLAY_DIGEST = struct.Struct('<IBiiii')     # tick, status, score, health, player x, y
+REPLAY_STATUS = ('running', 'dead', 'won')
+
+class InputRecorder:
+    # wraps another input source and run-length encodes its per-tick bitmasks
+    def __init__(self, source):
+        self.source = source
+        self.runs = []      # [mask, count]
+
+    def poll(self, tick, events=()):
+        inp = self.source.poll(tick, events)
+        mask = inp.mask
+        if self.runs and self.runs[-1][0] == mask:
+            self.runs[-1][1] += 1
         else:
-            powerups.add(GameControllerPowerUp(x, y))
-
-      # spawn 8 extra random collectibles per level
-      for _ in range(8):
-        col_type = random.choice(['coin', 'sushi', 'beer'])
-        x = random.randint(level_left, level_right)
-        y = random.randint(level_top, level_bottom)
-        if col_type == 'coin':
-            collectibles.add(CoinCollectible(x, y))
-        elif col_type == 'sushi':
-            collectibles.add(SushiCollectible(x, y))
+            self.runs.append([mask, 1])
+        return inp
+
+class ReplayInput:
+    # plays back a recorded mask stream; ticks past the end read as no input
+    def __init__(self, runs):
+        self.masks = [mask for mask, _ in runs]
+        self.ends = list(itertools.accumulate(count for _, count in runs))
+        self.states = {}
+
+    def __len__(self):
+        return self.ends[-1] if self.ends else 0
+
+    def poll(self, tick, events=()):
+        i = bisect.bisect_right(self.ends, tick)
+        mask = self.masks[i] if i < len(self.masks) else 0
+        inp = self.states.get(mask)
+        if inp is None:
+            inp = self.states[mask] = InputState.from_mask(mask)
+        return inp
+
+def replay_digest(world):
+    return (world.tick, REPLAY_STATUS.index(world.status), world.score,
+            world.player.health, world.player.rect.x, world.player.rect.y)
+
+def save_replay(path, seed, runs, digest, endless=False):
+    out = bytearray(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, seed, endless))
+    out += REPLAY_DIGEST.pack(*digest)
+    for mask, count in runs:
+        out.append(mask)
+        while True:
+            byte = count & 0x7f
+            count >>= 7
+            out.append(byte | (0x80 if count else 0))
+            if not count:
+                break
+    with open(path, 'wb') as f:
+        f.write(out)
+
+def load_replay(path):
+    # -> (seed, runs, digest, endless)
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, seed, endless = REPLAY_HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError(f"{path}: not a version {REPLAY_VERSION} replay")
+    pos = REPLAY_HEADER.size
+    digest = REPLAY_DIGEST.unpack_from(data, pos)
+    pos += REPLAY_DIGEST.size
+    runs = []
+    while pos < len(data):
+        mask = data[pos]
+        pos += 1
+        count = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            count |= (byte & 0x7f) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        runs.append((mask, count))
+    return seed, runs, digest, bool(endless)
+
+# — World —
+class World:
+    # all simulation state for one playthrough; step() advances exactly one fixed tick
+    def __init__(self, levels=None, seed=None, endless=False):
+        # endless: chunks come from the seeded generator as the camera approaches them,
+        # and chunks left behind are dropped, instead of planning `levels` up front
+        self.endless = endless
+        self.levels = None if endless else levels if levels is not None else make_levels()
+        # every random choice comes from this seed, so a seed plus inputs replays exactly
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
+        # array-backed stores for everything: static entities, enemies and projectiles
+        self.platforms    = EntityStore()
+        self.enemies      = EnemySystem()
+        self.powerups     = EntityStore()
+        self.collectibles = EntityStore()
+        self.projectiles  = ProjectilePool()
+        self.score = 0
+        self.chunks = {}          # chunk index -> [(sid, group name, class, args)]
+        self.records = {}         # sid -> (group name, class, args)
+        self.loaded = {}          # chunk index -> [Enemy] built for that chunk
+        self.active = set()
+        self.consumed = set()     # sids picked up or stomped; never rebuilt
+        self._sids = itertools.count()
+        self.nav = {}             # chunk index -> NavGraph of its platforms, while loaded
+        self.player_nav = None    # (chunk, node) of the platform the player last stood on
+        if endless:
+            self.generator = endless_chunks(self.seed)
+            self.frontier = 0     # next chunk index the generator will yield
         else:
-            collectibles.add(BeerCollectible(x, y))
-
-    # spawn with per‑level difficulty scaling
-    for idx, lvl in enumerate(levels):
-        xoff = idx * SCREEN_WIDTH
-
-        # increase difficulty by 10% per level index
-        diff = 1 + idx * 0.1
-
-        # shrink platforms slightly
-        for x, y, w, h in lvl['platforms']:
-            adj_w = max(50, int(w - idx * 10))
-            platforms.add(Platform(xoff + x, y, adj_w, h))
-
-        # speed up enemies and lengthen their patrol
-        for x, y, pat, spd in lvl['enemies']:
-            scaled_spd = max(1, int(spd * diff))
-            scaled_pat = int(pat * diff)
-            enemies.add(Enemy(xoff + x, y, scaled_pat, scaled_spd))
-            enemies.add(HockeyEnemy(xoff + x + 80, y, scaled_pat, scaled_spd))
-
-        # power‑ups & collectibles unchanged
-        for x, y, t in lvl['powerups']:
-            if t == 'hockey': powerups.add(HockeyPowerUp(xoff + x, y))
-            if t == 'laptop': powerups.add(LaptopPowerUp(xoff + x, y))
-        for x, y, c in lvl['collectibles']:
-            if c == 'coin':  collectibles.add(CoinCollectible(xoff + x, y))
-            if c == 'sushi': collectibles.add(SushiCollectible(xoff + x, y))
-            if c == 'beer':  collectibles.add(BeerCollectible(xoff + x, y))
-
-    player  = Player(10, 510)
+            self._plan()
+        self.player = Player(10, 510)
+        self.tick = 0
+        self.status = 'running'
+        self.stream_center = None
+        self.stream()
+
+    def _plan(self):
+        # spawn records only: entities are built when their chunk streams in
+        for idx, lvl in enumerate(self.levels):
+            xoff = idx * LEVEL_WIDTH
+            for x,y,w,h in lvl['platforms']:
+                self._place('platforms', Platform, xoff+x,y,w,h)
+            for x,y,pat,spd in lvl['enemies']:
+                self._place('enemies', Enemy, xoff+x,y,pat,spd)
+                self._place('enemies', HockeyEnemy, xoff+x+80,y,pat,spd)
+            for x,y,t in lvl['powerups']:
+                if t=='hockey': self._place('powerups', HockeyPowerUp, xoff+x,y)
+                if t=='laptop': self._place('powerups', LaptopPowerUp, xoff+x,y)
+                if t == 'controller':self._place('powerups', GameControllerPowerUp, xoff + x, y)
+            for x,y,c in lvl['collectibles']:
+                if c=='coin': self._place('collectibles', CoinCollectible, xoff+x,y)
+                if c=='sushi': self._place('collectibles', SushiCollectible, xoff+x,y)
+                if c=='beer': self._place('collectibles', BeerCollectible, xoff+x,y)
+        for idx in range(len(self.levels)):
+          xoff = idx * LEVEL_WIDTH
+          level_left  = xoff + 50
+          level_right = xoff + LEVEL_WIDTH - 50
+          level_top   = 100
+          level_bottom= SCREEN_HEIGHT - 100
+          # spawn 3 extra random power‑ups per level
+          for _ in range(3):
+            pu_type = self.rng.choice(['hockey', 'laptop', 'controller'])
+            x = self.rng.randint(level_left, level_right)
+            y = self.rng.randint(level_top, level_bottom)
+            if pu_type == 'hockey':
+                self._place('powerups', HockeyPowerUp, x, y)
+            elif pu_type == 'laptop':
+                self._place('powerups', LaptopPowerUp, x, y)
+            else:
+                self._place('powerups', GameControllerPowerUp, x, y)
+
+          # spawn 8 extra random collectibles per level
+          for _ in range(8):
+            col_type = self.rng.choice(['coin', 'sushi', 'beer'])
+            x = self.rng.randint(level_left, level_right)
+            y = self.rng.randint(level_top, level_bottom)
+            if col_type == 'coin':
+                self._place('collectibles', CoinCollectible, x, y)
+            elif col_type == 'sushi':
+                self._place('collectibles', SushiCollectible, x, y)
+            else:
+                self._place('collectibles', BeerCollectible, x, y)
+
+        # spawn with per‑level difficulty scaling
+        for idx, lvl in enumerate(self.levels):
+            xoff = idx * SCREEN_WIDTH
+
+            # increase difficulty by 10% per level index
+            diff = 1 + idx * 0.1
+
+            # shrink platforms slightly
+            for x, y, w, h in lvl['platforms']:
+                adj_w = max(50, int(w - idx * 10))
+                self._place('platforms', Platform, xoff + x, y, adj_w, h)
+
+            # speed up enemies and lengthen their patrol
+            for x, y, pat, spd in lvl['enemies']:
+                scaled_spd = max(1, int(spd * diff))
+                scaled_pat = int(pat * diff)
+                self._place('enemies', Enemy, xoff + x, y, scaled_pat, scaled_spd)
+                self._place('enemies', HockeyEnemy, xoff + x + 80, y, scaled_pat, scaled_spd)
+
+            # power‑ups & collectibles unchanged
+            for x, y, t in lvl['powerups']:
+                if t == 'hockey': self._place('powerups', HockeyPowerUp, xoff + x, y)
+                if t == 'laptop': self._place('powerups', LaptopPowerUp, xoff + x, y)
+            for x, y, c in lvl['collectibles']:
+                if c == 'coin':  self._place('collectibles', CoinCollectible, xoff + x, y)
+                if c == 'sushi': self._place('collectibles', SushiCollectible, xoff + x, y)
+                if c == 'beer':  self._place('collectibles', BeerCollectible, xoff + x, y)
+
+    def _plan_chunk(self, idx, spec):
+        # records for one generated chunk; its spawn ids come from its own block
+        self._sids = itertools.count(idx * CHUNK_SIDS)
+        self.chunks[idx] = []
+        for args in spec['platforms']:
+            self._place('platforms', Platform, *args)
+        for args in spec['enemies']:
+            self._place('enemies', Enemy, *args)
+        for args in spec['shooters']:
+            self._place('enemies', HockeyEnemy, *args)
+        for x, y, t in spec['powerups']:
+            self._place('powerups', POWERUP_TYPES[t], x, y)
+        for x, y, c in spec['collectibles']:
+            self._place('collectibles', COLLECTIBLE_TYPES[c], x, y)
+
+    def _pull(self, upto):
+        # endless mode: take chunks from the generator until chunk `upto` is planned
+        while self.frontier <= upto:
+            idx, spec = next(self.generator)
+            self._plan_chunk(idx, spec)
+            self.frontier = idx + 1
+
+    def _drop(self, idxs):
+        # endless mode: forget chunks for good, records and consumed ids included
+        for idx in idxs:
+            for sid, *_ in self.chunks.pop(idx):
+                del self.records[sid]
+                self.consumed.discard(sid)
+
+    def _place(self, group, cls, *args):
+        # bucket by spawn x; one chunk per LEVEL_WIDTH of world
+        chunk = max(0, args[0] // LEVEL_WIDTH)
+        sid = next(self._sids)
+        self.chunks.setdefault(chunk, []).append((sid, group, cls, args))
+        self.records[sid] = (group, cls, args)
+
+    def _activate(self, idx):
+        # static entities are respawned straight from the records; enemy views are
+        # built once and kept while the chunk stays loaded
+        records = self.chunks.get(idx, ())
+        if idx not in self.nav:
+            self.nav[idx] = NavGraph([Platform.rect(*args) for _, group, _, args in records
+                                      if group == 'platforms'])
+        enemies = self.loaded.get(idx)
+        if enemies is None:
+            enemies = self.loaded[idx] = []
+            nav = self.nav[idx]
+            for sid, group, cls, args in records:
+                if group == 'enemies' and sid not in self.consumed:
+                    en = cls(*args)
+                    en.sid = sid
+                    # chasers navigate the graph of the chunk they spawned in
+                    if en.chases:
+                        en.state.update(chunk=idx, node=nav.node_at(en.rect))
+                    enemies.append(en)
+        for sid, group, cls, args in records:
+            if group != 'enemies' and sid not in self.consumed:
+                getattr(self, group).spawn(cls, *args, chunk=idx, sid=sid)
+        self.enemies.add(*enemies)
+        self.active.add(idx)
+
+    def _suspend(self, idx):
+        # pull the chunk out of every store; anything already taken or killed is
+        # remembered as consumed
+        live = set()
+        for group in ENTITY_GROUPS:
+            live.update(getattr(self, group).suspend(idx))
+        self.consumed.update(sid for sid, group, _, _ in self.chunks.get(idx, ())
+                             if group != 'enemies' and sid not in live)
+        keep = []
+        for en in self.loaded[idx]:
+            if en.alive():
+                self.enemies.remove(en)
+                keep.append(en)
+            else:
+                self.consumed.add(en.sid)
+        self.loaded[idx] = keep
+        self.active.discard(idx)
+
+    def stream(self):
+        # simulate only the chunks around the camera; suspended chunks keep their enemies
+        # for a quick return, anything further away is freed and rebuilt from its records
+        center = self.current_level()
+        if center == self.stream_center:
+            return
+        self.stream_center = center
+        if self.endless:
+            self._pull(center + STREAM_RADIUS)
+        want = {i for i in range(center - STREAM_RADIUS, center + STREAM_RADIUS + 1)
+                if i in self.chunks}
+        for idx in sorted(self.active - want):
+            self._suspend(idx)
+        for idx in [i for i in self.loaded if abs(i - center) > STREAM_KEEP]:
+            del self.loaded[idx]
+        for idx in [i for i in self.nav if abs(i - center) > STREAM_KEEP]:
+            del self.nav[idx]
+        if self.endless:
+            self._drop([i for i in self.chunks if i < center - STREAM_KEEP])
+        for idx in sorted(want - self.active):
+            self._activate(idx)
+
+    # ── Snapshots ──
+    # plain records (tuples, ints and NumPy row copies), never sprites or surfaces.
+    # restore() works on this world or any other built from the same levels and seed,
+    # and reuses enemy views that are already built; with a level's worth of entities a
+    # snapshot or restore takes roughly 0.2-0.8 ms, more when enemies must be rebuilt.
+    # a restored world steps exactly like the one that was saved.
+    def snapshot(self):
+        # suspended chunks only hold surviving enemies; in live ones the dead are consumed
+        loaded, consumed = {}, set(self.consumed)
+        for idx, enemies in self.loaded.items():
+            live = idx in self.active
+            consumed.update(en.sid for en in enemies if live and not en.alive())
+            loaded[idx] = tuple((en.sid, None if live else tuple(en.state.items()))
+                                for en in enemies if not live or en.alive())
+        enemies = self.enemies
+        snap = {
+            'seed': self.seed, 'tick': self.tick, 'status': self.status, 'score': self.score,
+            'rng': self.rng.getstate(), 'player': self.player.snapshot(),
+            'consumed': frozenset(consumed), 'loaded': loaded, 'active': tuple(sorted(self.active)),
+            'enemies': (enemies.save(), tuple((i, en.sid) for i, en in enemies.views.items())),
+            'projectiles': self.projectiles.save(),
+            'stream_center': self.stream_center, 'player_nav': self.player_nav,
+        }
+        if self.endless:
+            snap['chunks'], snap['frontier'] = tuple(sorted(self.chunks)), self.frontier
+        for group in ENTITY_GROUPS:
+            snap[group] = getattr(self, group).save()
+        return snap
+
+    def restore(self, snap):
+        if snap['seed'] != self.seed:
+            raise ValueError(f"snapshot is from seed {snap['seed']}, this world is {self.seed}")
+        if self.endless:
+            # regenerate the snapshot's chunks straight from their indices
+            keep = set(snap['chunks'])
+            self._drop([i for i in self.chunks if i not in keep])
+            for idx in sorted(keep - set(self.chunks)):
+                self._plan_chunk(idx, endless_chunk(self.seed, idx))
+            self.frontier = snap['frontier']
+            self.generator = endless_chunks(self.seed, self.frontier)
+        built = {en.sid: en for enemies in self.loaded.values() for en in enemies}
+        self.loaded = {}
+        for idx, entries in snap['loaded'].items():
+            enemies = self.loaded[idx] = []
+            for sid, state in entries:
+                en = built.get(sid)
+                if en is None:
+                    _, cls, args = self.records[sid]
+                    en = built[sid] = cls(*args)
+                    en.sid = sid
+                if state is not None:
+                    en.state = dict(state)
+                enemies.append(en)
+        for idx in snap['active']:
+            if idx not in self.nav:
+                self.nav[idx] = NavGraph([Platform.rect(*args) for _, group, _, args
+                                          in self.chunks[idx] if group == 'platforms'])
+        for group in ENTITY_GROUPS:
+            getattr(self, group).load(snap[group])
+        saved, views = snap['enemies']
+        self.enemies.load(saved, {i: built[sid] for i, sid in views})
+        self.projectiles.load(snap['projectiles'])
+        self.active = set(snap['active'])
+        self.consumed = set(snap['consumed'])
+        self.rng.setstate(snap['rng'])
+        self.player.restore(snap['player'])
+        self.tick, self.status, self.score = snap['tick'], snap['status'], snap['score']
+        self.stream_center, self.player_nav = snap['stream_center'], snap['player_nav']
+
+    @property
+    def width(self):
+        return math.inf if self.endless else len(self.levels) * LEVEL_WIDTH
+
+    def camera(self):
+        cam = self.player.rect.centerx - SCREEN_WIDTH // 2
+        return max(0, min(cam, self.width - SCREEN_WIDTH))
+
+    def current_level(self, cam=None):
+        return (self.camera() if cam is None else cam) // LEVEL_WIDTH
+
+    def _keep_in_bounds(self):
+        # endless mode: dropped chunks are gone, so the left edge of the oldest one is a
+        # wall; falls respawn at the start of the furthest chunk stood in
+        player = self.player
+        player.rect.left = max(player.rect.left, min(self.chunks) * LEVEL_WIDTH)
+        chunk = player.rect.centerx // LEVEL_WIDTH
+        if player.on_ground and chunk * LEVEL_WIDTH + 10 > player.spawn[0]:
+            player.spawn = (chunk * LEVEL_WIDTH + 10, 510)
+
+    def pursuit(self):
+        # where chasing enemies should head: the player's platform and its cached route
+        player = self.player
+        if player.on_ground:
+            chunk = player.rect.centerx // LEVEL_WIDTH
+            self.player_nav = None
+            for c in (chunk, chunk - 1):
+                node = self.nav[c].node_at(player.rect) if c in self.nav else -1
+                if node >= 0:
+                    self.player_nav = (c, node)
+                    break
+        if self.player_nav is None or self.player_nav[0] not in self.nav:
+            return None
+        chunk, node = self.player_nav
+        graph = self.nav[chunk]
+        return chunk, node, player.rect.centerx, graph, graph.route(node)
+
+    def step(self, inp, lap=None):
+        # lap(phase) is called as each phase finishes, for benchmarks and profiling
+        self.stream()
+        self.player.move(self.platforms, inp)
+        if self.endless:
+            self._keep_in_bounds()
+        if lap: lap('player')
+        self.score += self.player.interact(self.enemies, self.projectiles, self.powerups,
+                                           self.collectibles, inp)
+        if lap: lap('collide')
+        self.enemies.update(self.projectiles, self.pursuit())
+        if lap: lap('enemies')
+        self.projectiles.update()
+        if lap: lap('projectiles')
+        self.tick += 1
+        # ── GAME OVER WHEN HEALTH REACHES ZERO ──
+        if self.player.health <= 0:
+            self.status = 'dead'
+        # ── END‑OF‑GAME: once the player's right side passes the span of all levels ──
+        elif (not self.endless and self.current_level() == len(self.levels) - 1
+              and self.player.rect.right >= self.width):
+            self.status = 'won'
+        return self.status
+
+def run_headless(controls=None, max_ticks=FPS * 60 * 10, levels=None, seed=None, endless=False):
+    # no window, no frame cap: tick the world as fast as Python allows
+    controls = controls or ScriptedInput(run_right_and_hop)
+    world = World(levels, seed, endless)
+    while world.status == 'running' and world.tick < max_ticks:
+        world.step(controls.poll(world.tick))
+    return world
+
+# — Interpolation —
+class Interpolation:
+    # positions from before the latest tick; at render time moving things are drawn
+    # alpha of the way from there to where they are now
+    def __init__(self):
+        self.alpha = 1.0
+        self.cam = None
+
+    def capture(self, world):
+        self.cam = world.camera()
+        self.player = world.player.rect.topleft
+        self.slots = {}
+        for name in ('enemies', 'projectiles'):
+            system = getattr(world, name)
+            n = system.top
+            self.slots[name] = (system.x[:n].copy(), system.y[:n].copy(), system.alive[:n].copy())
+
+    def camera(self, cam):
+        # a respawn jumps the camera too; blending it would cull and theme the wrong window
+        if self.cam is None or abs(cam - self.cam) > SNAP_DISTANCE:
+            return cam
+        return round(self.cam + (cam - self.cam) * self.alpha)
+
+    def _blend(self, rect, x0, y0):
+        if abs(rect.x - x0) > SNAP_DISTANCE or abs(rect.y - y0) > SNAP_DISTANCE:
+            return rect
+        a = self.alpha
+        return rect.move(round((x0 - rect.x) * (1 - a)), round((y0 - rect.y) * (1 - a)))
+
+    def player_rect(self, rect):
+        return rect if self.cam is None else self._blend(rect, *self.player)
+
+    def slot_rect(self, name, slot, rect):
+        if self.cam is None:
+            return rect
+        x, y, alive = self.slots[name]
+        if slot >= len(alive) or not alive[slot]:
+            return rect
+        return self._blend(rect, int(x[slot]), int(y[slot]))
+
+def draw_world(renderer, hud, background, world, cam, banner=None, overlay=(), lap=None,
+               interp=None):
+    # draw all sprites inside the camera window, then the HUD and any overlay on top.
+    # interp, when given, blends enemies, projectiles and the player between ticks
+    items = []
+    view = pygame.Rect(cam, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+    for i, img, rect in world.platforms.visible(view):
+        items.append((('platforms', i), img, rect.move(-cam, 0)))
+    for spr in world.enemies.visible(view):
+        rect = interp.slot_rect('enemies', spr.slot, spr.rect) if interp else spr.rect
+        items.append((spr, spr.image, rect.move(-cam, 0)))
+    for i, img, rect in world.projectiles.visible(view):
+        if interp: rect = interp.slot_rect('projectiles', i, rect)
+        items.append((('projectile', i), img, rect.move(-cam, 0)))
+    for name in ('powerups', 'collectibles'):
+        for i, img, rect in getattr(world, name).visible(view):
+            items.append(((name, i), img, rect.move(-cam, 0)))
+    player = world.player
+    rect = interp.player_rect(player.rect) if interp else player.rect
+    items.append((player, player.image, rect.move(-cam, 0)))
+    if lap: lap('cull')
+    items.extend(hud.items(world, banner))
+    items.extend(overlay)
+    if lap: lap('hud')
+    renderer.draw(background, cam, items, lap)
+
+# — Profiling —
+# phases in the order the main loop laps them; the World.step laps are included
+PROFILE_PHASES = ('events', 'player', 'collide', 'enemies', 'projectiles',
+                  'cull', 'hud', 'background', 'sprites', 'present', 'idle')
+PROFILE_COLORS = ((120,120,120), (0,120,255), (255,140,0), (220,0,0), (160,0,160),
+                  (0,180,180), (255,215,0), (170,120,60), (0,200,0), (255,255,255), (100,100,100))
+
+class FrameProfiler:
+    # per-phase frame timings in a fixed ring buffer. lap(phase) charges the time since
+    # the previous lap to that phase; when disabled the loop passes lap=None instead,
+    # so the only cost left is one falsy check per phase.
+    def __init__(self, frames=PROFILE_FRAMES):
+        self.samples = np.zeros((frames, len(PROFILE_PHASES)))   # seconds
+        self.starts = np.zeros(frames)                           # perf_counter at frame start
+        self.index = {p: i for i, p in enumerate(PROFILE_PHASES)}
+        self.enabled = False
+        self.frame = -1
+        self.count = 0
+        self.mark = 0.0
+        self.graph = None
+
+    def begin_frame(self):
+        self.frame = (self.frame + 1) % len(self.samples)
+        self.count = min(self.count + 1, len(self.samples))
+        self.samples[self.frame] = 0.0
+        self.mark = self.starts[self.frame] = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.samples[self.frame, self.index[phase]] += now - self.mark
+        self.mark = now
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.frame, self.count, self.graph = -1, 0, None
+
+    def recent(self):
+        # (frames, phases) in milliseconds, oldest first
+        order = (np.arange(self.count) + self.frame + 1 - self.count) % len(self.samples)
+        return self.samples[order] * 1000.0, self.starts[order]
+
+    def overlay(self, font):
+        # stacked per-phase bars for the last PROFILE_GRAPH_WIDTH frames, redrawn every
+        # PROFILE_GRAPH_EVERY frames; the line marks one 60 fps frame
+        if self.count and (self.graph is None or self.count % PROFILE_GRAPH_EVERY == 0):
+            ms, _ = self.recent()
+            ms = ms[-PROFILE_GRAPH_WIDTH:]
+            w, h = PROFILE_GRAPH_WIDTH, PROFILE_GRAPH_HEIGHT
+            scale = h / (2000.0 / FPS)
+            legend = [text_cache.render(font, f"{p} {ms[:, i].mean():.2f}", PROFILE_COLORS[i])
+                      for i, p in enumerate(PROFILE_PHASES)]
+            lw = max(l.get_width() for l in legend) + 8
+            surf = pygame.Surface((w + lw, max(h, sum(l.get_height() for l in legend))),
+                                  pygame.SRCALPHA)
+            surf.fill((0, 0, 0, 160))
+            tops = h - np.cumsum(ms, axis=1) * scale
+            bottoms = np.hstack([np.full((len(ms), 1), float(h)), tops[:, :-1]])
+            for x in range(len(ms)):
+                for i in range(len(PROFILE_PHASES)):
+                    if bottoms[x, i] - tops[x, i] >= 1:
+                        pygame.draw.line(surf, PROFILE_COLORS[i], (x, int(bottoms[x, i])),
+                                         (x, max(0, int(tops[x, i]))))
+            budget = int(h - scale * 1000.0 / FPS)
+            pygame.draw.line(surf, (255, 0, 0), (0, budget), (w, budget))
+            y = 0
+            for l in legend:
+                surf.blit(l, (w + 4, y))
+                y += l.get_height()
+            self.graph = surf
+        if self.graph is None:
+            return []
+        return [('profiler', self.graph, self.graph.get_rect(bottomleft=(10, SCREEN_HEIGHT - 10)))]
+
+    def export(self, path):
+        # Chrome trace (chrome://tracing, Perfetto) for .json paths ending in .trace.json,
+        # plain {"phases", "frames"} JSON otherwise
+        ms, starts = self.recent()
+        if path.endswith('.trace.json'):
+            events = []
+            origin = starts[0] if len(starts) else 0.0
+            for f in range(len(ms)):
+                ts = (starts[f] - origin) * 1e6
+                events.append({'name': 'frame', 'ph': 'X', 'pid': 0, 'tid': 0,
+                               'ts': ts, 'dur': float(ms[f].sum() * 1000.0)})
+                for i, phase in enumerate(PROFILE_PHASES):
+                    dur = float(ms[f, i] * 1000.0)
+                    if dur > 0:
+                        events.append({'name': phase, 'ph': 'X', 'pid': 0, 'tid': 0,
+                                       'ts': ts, 'dur': dur})
+                    ts += dur
+            data = {'traceEvents': events, 'displayTimeUnit': 'ms'}
+        else:
+            data = {'phases': list(PROFILE_PHASES), 'frames': ms.round(4).tolist()}
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        return path
+
+# — Main Game Loop —
+def main(record=None, replay=None, render_fps=FPS, vsync=False,
+         render_scale=RENDER_SCALE, window_scale=WINDOW_SCALE, endless=False):
+    # record: path to save this session's seed and inputs to on exit
+    # replay: path of a recording to play back, uncapped, instead of the keyboard
+    # render_fps: cap on rendered frames per second, 0 for uncapped; the simulation
+    # always runs at FPS ticks per second and rendering interpolates between ticks
+    # vsync: let the display's refresh pace rendering instead of the clock
+    # render_scale / window_scale: internal resolution and window size, relative to
+    # SCREEN_WIDTH x SCREEN_HEIGHT; the scene is upscaled to the window once per frame
+    # endless: procedurally generated chunks instead of the campaign (replays keep their own mode)
+    pygame.init()
+    window = (round(SCREEN_WIDTH * window_scale), round(SCREEN_HEIGHT * window_scale))
+    internal = (round(SCREEN_WIDTH * render_scale), round(SCREEN_HEIGHT * render_scale))
+    screen = None
+    paced = False       # True only once a vsync renderer is really pacing the flips
+    if vsync:
+        # without a vsync-capable renderer set_mode either raises or just warns and
+        # hands back a software surface; both fall back to the clock
+        try:
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always')
+                screen = pygame.display.set_mode(window, pygame.SCALED, vsync=1)
+            paced = not caught
+        except pygame.error:
+            pass
+    if screen is None:
+        screen = pygame.display.set_mode(window)
+    pygame.display.set_caption("2D Platformer")
+    clock = pygame.time.Clock()
+    font_small = get_font(None, 36)
+    big_font   = get_font(None, 72)
+    warm_sprite_cache()
+
+    # backgrounds decode on worker threads; the first frame only waits for its own,
+    # and they are scaled straight to the internal resolution
+    backgrounds = AssetLoader(BACKGROUND_NAMES, internal)
+
+    if replay:
+        seed, runs, expected, endless = load_replay(replay)
+        world    = World(seed=seed, endless=endless)
+        controls = ReplayInput(runs)
+    else:
+        world    = World(endless=endless)
+        controls = KeyboardInput()
+    if record:
+        controls = InputRecorder(controls)
+    renderer = Renderer(screen, size=internal)
+    hud      = Hud(font_small)
+    profiler = FrameProfiler()   # F3 toggles it with its graph, F4 exports a trace
+    interp   = Interpolation()
+    # start-of-level snapshots to retry from after a game over; recordings and replays
+    # keep one continuous run, so they end at game over as before
+    retry = not (record or replay)
+    checkpoint = world.snapshot() if retry else None
+    checkpoint_level = world.current_level()
     last_level    = -1
     level_msg_tmr = 0
+    pending = []                 # events not yet seen by a tick (Q taps between ticks)
+    lag = 0.0                    # wall time owed to the simulation
+    last = time.perf_counter()
     running = True
 
     while running:
-        for e in pygame.event.get():
+        lap = None
+        if profiler.enabled:
+            profiler.begin_frame()
+            lap = profiler.lap
+        events = pygame.event.get()
+        for e in events:
             if e.type == pygame.QUIT:
                 running = False
-            elif e.type == pygame.KEYDOWN and e.key == pygame.K_q:
-               # only if we've picked up the hockey power‑up and cooldown is over
-               if player.has_hockey and player.shoot_timer <= 0:
-                   pucks.add(Puck(
-                       player.rect.centerx,
-                       player.rect.centery,
-                       player.facing
-                   ))
-                   player.shoot_timer = SHOOT_COOLDOWN
-
-        # update all sprites
-        player.update(platforms, enemies, pucks, notes, powerups, collectibles)
-        enemies.update()
-        pucks.update()
-        notes.update()
+            elif e.type == pygame.KEYDOWN and e.key == pygame.K_F3:
+                profiler.toggle()
+            elif e.type == pygame.KEYDOWN and e.key == pygame.K_F4 and profiler.count:
+                print("profile written to", profiler.export(f"profile-{int(time.time())}.trace.json"))
+        pending.extend(events)
+        if lap: lap('events')
 
-        # ── GAME OVER WHEN HEALTH REACHES ZERO ──
-        if player.health <= 0:
-            show_message(screen, big_font, "Game Over", (255, 0, 0))
+        # advance the simulation in fixed ticks for the time since the last frame; after
+        # MAX_FRAME_SKIP extra ticks the rest of the backlog is dropped
+        now = time.perf_counter()
+        lag += now - last
+        last = now
+        due = 1 if replay else int(lag / TICK_SECONDS)
+        for _ in range(min(due, MAX_FRAME_SKIP + 1)):
+            interp.capture(world)
+            world.step(controls.poll(world.tick, pending), lap)
+            pending.clear()
+            level_msg_tmr = max(0, level_msg_tmr - 1)
+            if world.status != 'running':
+                break
+        lag = 0.0 if replay else lag - due * TICK_SECONDS
+        interp.alpha = 1.0 if replay else lag / TICK_SECONDS
+
+        if replay and (world.status != 'running' or world.tick >= len(controls)):
             running = False
             continue
+        if world.status == 'dead':
+            show_message(screen, big_font, "Game Over", (255, 0, 0))
+            if checkpoint is None:
+                running = False
+                continue
+            world.restore(checkpoint)
+            interp = Interpolation()
+            renderer.invalidate()
+            pending.clear()
+            lag, last, last_level = 0.0, time.perf_counter(), -1
+        elif retry and world.current_level() > checkpoint_level:
+            checkpoint = world.snapshot()
+            checkpoint_level = world.current_level()
 
         # camera
-        cam = player.rect.centerx - SCREEN_WIDTH // 2
-        cam = max(0, min(cam, len(levels)*LEVEL_WIDTH - SCREEN_WIDTH))
-
-        # draw background
-        current_level = cam // LEVEL_WIDTH
+        cam = interp.camera(world.camera())
+        current_level = world.current_level(cam)
 
         # ── END‑OF‑GAME: THANKS FOR PLAYING ──
-        last_idx = len(levels) - 1
-        # if we’re on the final level and the player’s right side 
-        # has passed the total span of all levels, finish up
-        if current_level == last_idx and player.rect.right >= len(levels) * LEVEL_WIDTH:
+        if world.status == 'won':
             show_message(screen, big_font, "Thanks for Playing!", (0, 255, 0))
             running = False
             continue
@@ -485,38 +2048,71 @@ def main():
         if current_level != last_level:
             last_level    = current_level
             level_msg_tmr = LEVEL_MSG_DURATION
-        screen.blit(backgrounds[current_level], (0, 0))
-
-        # ── HEALTH DISPLAY ──
-        health_surf = font_small.render(f"Health: {player.health}", True, (255, 0, 0))
-        screen.blit(health_surf, (10, 10))
-
-        # ── SCORE DISPLAY ──
-        score_surf = font_small.render(f"Score: {score}", True, (255, 215, 0))
-        # position at top‑right, with a 10px margin
-        score_x   = SCREEN_WIDTH - score_surf.get_width() - 10
-        screen.blit(score_surf, (score_x, 10))
 
         # ── LEVEL BANNER ──
+        banner = None
         if level_msg_tmr > 0:
-            # center message text
-            text = LEVEL_MESSAGES[current_level]
-            msg_surf = font_small.render(text, True, (255, 255, 255))
-            msg_x = (SCREEN_WIDTH - msg_surf.get_width()) // 2
-            screen.blit(msg_surf, (msg_x, 50))
-            level_msg_tmr -= 1
-
-        # draw all sprites
-        for grp in (platforms, enemies, pucks, notes, powerups, collectibles):
-            for spr in grp:
-                screen.blit(spr.image, (spr.rect.x - cam, spr.rect.y))
-        screen.blit(player.image, (player.rect.x - cam, player.rect.y))
+            banner = (f"Stage {current_level + 1}" if world.endless
+                      else LEVEL_MESSAGES[current_level])
+        overlay = profiler.overlay(get_font(None, 18)) if lap else ()
+        background = backgrounds[current_level % len(backgrounds)]
+        draw_world(renderer, hud, background, world, cam, banner, overlay, lap, interp)
 
-        pygame.display.flip()
-        clock.tick(FPS)
+        if not replay and not paced:
+            clock.tick(render_fps)
+        if lap: lap('idle')
 
+    if record:
+        save_replay(record, world.seed, controls.runs, replay_digest(world), world.endless)
     pygame.quit()
+    if replay:
+        sys.exit(check_replay(world, expected))
     sys.exit()
 
+def check_replay(world, expected):
+    # compare a finished replay with the digest stored in the recording; exit status
+    got = replay_digest(world)
+    if got == tuple(expected):
+        print(f"replay OK: {world.status} at tick {world.tick}, score {world.score}")
+        return 0
+    print(f"replay MISMATCH: expected {tuple(expected)}, got {got}", file=sys.stderr)
+    return 1
+
 if __name__=='__main__':
-    main()
\ No newline at end of file
+    import argparse
+    ap = argparse.ArgumentParser(description="2D platformer")
+    ap.add_argument('--headless', action='store_true',
+                    help='simulate without a window or frame cap (scripted bot unless --replay)')
+    ap.add_argument('--record', metavar='PATH', help="save the session's seed and inputs")
+    ap.add_argument('--replay', metavar='PATH', help='play back a recording and verify it')
+    ap.add_argument('--render-fps', type=int, default=FPS, metavar='N',
+                    help=f'cap on rendered frames per second, 0 for uncapped (default {FPS}); '
+                         'the simulation stays at a fixed rate')
+    ap.add_argument('--vsync', action='store_true', help='pace rendering by the display refresh')
+    ap.add_argument('--render-scale', type=float, default=RENDER_SCALE, metavar='S',
+                    help='internal resolution relative to 800x600, e.g. 0.5 for half-res')
+    ap.add_argument('--window-scale', type=float, default=WINDOW_SCALE, metavar='S',
+                    help='window size relative to 800x600')
+    ap.add_argument('--endless', action='store_true',
+                    help='play procedurally generated chunks that never run out')
+    args = ap.parse_args()
+    if args.headless:
+        controls, seed, max_ticks, endless = None, None, FPS * 60 * 10, args.endless
+        if args.replay:
+            seed, runs, expected, endless = load_replay(args.replay)
+            controls = ReplayInput(runs)
+            max_ticks = len(controls)
+        if args.record:
+            controls = InputRecorder(controls or ScriptedInput(run_right_and_hop))
+        started = time.perf_counter()
+        world = run_headless(controls, max_ticks, seed=seed, endless=endless)
+        elapsed = time.perf_counter() - started
+        print(f"{world.status} after {world.tick} ticks, score {world.score}, "
+              f"{elapsed:.3f}s ({world.tick / max(elapsed, 1e-9):.0f} ticks/s)")
+        if args.record:
+            save_replay(args.record, world.seed, controls.runs, replay_digest(world), endless)
+        if args.replay:
+            sys.exit(check_replay(world, expected))
+    else:
+        main(args.record, args.replay, args.render_fps, args.vsync, args.render_scale,
+             args.window_scale, args.endless)
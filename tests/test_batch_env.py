@@ -0,0 +1,19 @@
+import numpy as np
+
+import batch_env
+import game
+
+def rollout(num_workers, ticks=120):
+    # max_ticks=50 forces every world through two auto-resets
+    actions = np.full(3, game.INPUT_RIGHT | game.INPUT_JUMP, np.uint8)
+    with batch_env.BatchEnv(3, num_workers=num_workers, max_ticks=50) as env:
+        frames = [env.reset(seeds=[1, 2, 3])]
+        for _ in range(ticks):
+            obs, rewards, dones = env.step(actions)
+            frames += [obs, rewards, dones]
+    return frames
+
+def test_seeded_batches_match_across_auto_resets():
+    local = rollout(0)
+    assert all(np.array_equal(a, b) for a, b in zip(local, rollout(0)))
+    assert all(np.array_equal(a, b) for a, b in zip(local, rollout(2)))